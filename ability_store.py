@@ -0,0 +1,160 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pokeapi import CACHE_DIR, get_resource, list_resources, normalize_key
+
+ABILITY_STORE_PATH = os.environ.get("POKESSENTIAL_ABILITY_STORE", os.path.join(CACHE_DIR, "abilities.json.gz"))
+BUILD_WORKERS = 8
+DEFAULT_LANGUAGES = ("fr", "en")
+
+
+class AbilityRecord(namedtuple("AbilityRecord", ["name", "id", "names", "descriptions"])):
+    """
+    Talent réduit à l'essentiel : nom et description la plus récente par langue.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, data):
+        """
+        Construit le record à partir d'une réponse /ability/{name}.
+        """
+        names = {entry["language"]["name"]: entry["name"] for entry in data["names"]}
+        descriptions = {}
+        # Les entrées sont triées par version : la dernière de chaque langue est la plus récente
+        for entry in data["flavor_text_entries"]:
+            descriptions[entry["language"]["name"]] = " ".join(entry["flavor_text"].split())
+        return cls(data["name"], data["id"], names, descriptions)
+
+    def describe(self, languages=DEFAULT_LANGUAGES):
+        """
+        Retourne le nom et la description dans la première langue disponible.
+        Args:
+            languages: Langues par ordre de préférence (ex: ("fr", "en"))
+        Returns:
+            Tuple (nom traduit, description), (None, None) si aucune langue n'a de description
+        """
+        for language in languages:
+            description = self.descriptions.get(language)
+            if description:
+                return self.names.get(language), description
+        return None, None
+
+
+class AbilityStore:
+    """
+    Talents indexés par nom et par id, chaque ressource /ability n'étant analysée qu'une fois.
+    """
+
+    def __init__(self, records=(), complete=False):
+        """
+        Args:
+            records: AbilityRecord déjà connus
+            complete: True si records contient tous les talents de PokéAPI
+        """
+        self.complete = complete
+        self._records = {}
+        self._lock = threading.Lock()
+        for record in records:
+            self._add(AbilityRecord(*record))
+
+    def _add(self, record):
+        self._records[record.name] = record
+        self._records[str(record.id)] = record
+
+    def get(self, ability_name):
+        """
+        Retourne le record d'un talent (nom ou id), téléchargé si besoin.
+        Args:
+            ability_name: Nom du talent (ex: "blaze", "Solar Power", "solar_power")
+        """
+        key = normalize_key(ability_name)
+        record = self._records.get(key)
+        if record is None:
+            if self.complete:
+                raise LookupError(f"Talent inconnu : {ability_name}")
+            record = AbilityRecord.from_api(get_resource("ability", key))
+            with self._lock:
+                self._add(record)
+        return record
+
+    def describe(self, ability_name, languages=DEFAULT_LANGUAGES):
+        """
+        Nom et description d'un talent dans la première langue disponible (voir AbilityRecord.describe).
+        """
+        return self.get(ability_name).describe(languages)
+
+    def records(self):
+        """
+        Retourne les records connus, triés par id.
+        """
+        unique = {record.id: record for record in self._records.values()}
+        return [unique[ability_id] for ability_id in sorted(unique)]
+
+    def load_all(self, workers=BUILD_WORKERS):
+        """
+        Charge tous les talents de PokéAPI.
+        """
+        entries = list_resources("ability")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda entry: self.get(entry["name"]), entries))
+        self.complete = True
+
+    @classmethod
+    def load(cls, path=ABILITY_STORE_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["records"], complete=data["complete"])
+
+    def save(self, path=ABILITY_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"complete": self.complete, "records": self.records()}
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+
+    def __contains__(self, ability_name):
+        return normalize_key(ability_name) in self._records
+
+
+_ability_store = None
+_ability_store_lock = threading.Lock()
+
+
+def get_ability_store(path=ABILITY_STORE_PATH):
+    """
+    Retourne le store des talents : chargé depuis le disque s'il a été construit,
+    sinon rempli au fil des demandes.
+    """
+    global _ability_store
+    if _ability_store is None:
+        with _ability_store_lock:
+            if _ability_store is None:
+                _ability_store = AbilityStore.load(path) if os.path.exists(path) else AbilityStore()
+    return _ability_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store des talents")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Charge tous les talents depuis PokéAPI")
+    build_parser.add_argument("path", nargs="?", default=ABILITY_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        store = AbilityStore()
+        store.load_all()
+        store.save(args.path)
+        print(f"{len(store.records())} talents écrits dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import threading
+import unicodedata
+from itertools import combinations
+
+from ability_store import get_ability_store
+from name_index import get_name_index
+
+DEFAULT_MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def normalize_answer(text):
+    """
+    Normalise une réponse : accents, casse, espaces, tirets et ponctuation ignorés.
+    Args:
+        text: Réponse saisie ou nom de référence (ex: "Mr. Mime", "Évoli")
+    Returns:
+        Chaîne normalisée (ex: "mrmime", "evoli")
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if c.isalnum()).casefold()
+
+
+def allowed_distance(text, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    Distance d'édition tolérée selon la longueur de la réponse :
+    aucune faute sur les noms très courts, une seule sur les noms courts.
+    """
+    if len(text) <= 3:
+        return 0
+    if len(text) <= 5:
+        return min(1, max_distance)
+    return max_distance
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Distance de Damerau-Levenshtein restreinte (inversion de deux lettres = 1 faute).
+    Returns:
+        La distance, ou max_distance + 1 si elle dépasse max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None and j > 1
+                and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else max_distance + 1
+
+
+def _deletes(term, max_distance):
+    deletes = {term}
+    for count in range(1, min(max_distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), count):
+            deletes.add("".join(c for i, c in enumerate(term) if i not in positions))
+    return deletes
+
+
+class AnswerMatcher:
+    """
+    Index de recherche approchée de type SymSpell.
+
+    Chaque nom est indexé par toutes les suppressions de max_distance
+    lettres au plus de son préfixe : une recherche ne compare la réponse
+    qu'aux quelques noms partageant une de ces suppressions, au lieu de
+    la comparer à tous les noms.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        """
+        Args:
+            max_distance: Distance d'édition maximale indexée
+            prefix_length: Longueur du préfixe utilisé pour les suppressions
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._values = {}  # nom normalisé -> ensemble des valeurs (slugs)
+        self._index = {}  # suppression -> ensemble des noms normalisés
+        self._known_values = set()
+
+    def add(self, name, value):
+        """
+        Indexe un nom (dans n'importe quelle langue) pour une valeur.
+        Args:
+            name: Nom accepté (ex: "Dracaufeu")
+            value: Valeur retournée par les recherches (ex: "charizard")
+        """
+        term = normalize_answer(name)
+        if not term:
+            return
+        if term not in self._values:
+            self._values[term] = set()
+            for delete in _deletes(term[:self.prefix_length], self.max_distance):
+                self._index.setdefault(delete, set()).add(term)
+        self._values[term].add(value)
+        self._known_values.add(value)
+
+    def lookup(self, guess, max_distance=None):
+        """
+        Recherche les valeurs dont un nom est proche de la réponse.
+        Args:
+            guess: Réponse saisie
+            max_distance: Distance maximale (par défaut celle de l'index)
+        Returns:
+            Liste de tuples (valeur, distance) triée par distance
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+        term = normalize_answer(guess)
+        if not term:
+            return []
+
+        best = {}
+        if term in self._values:
+            for value in self._values[term]:
+                best[value] = 0
+        candidates = set()
+        for delete in _deletes(term[:self.prefix_length], max_distance):
+            candidates |= self._index.get(delete, set())
+        for candidate in candidates:
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                for value in self._values[candidate]:
+                    if distance < best.get(value, max_distance + 1):
+                        best[value] = distance
+        return sorted(best.items(), key=lambda item: (item[1], item[0]))
+
+    def matches(self, guess, expected, max_distance=None):
+        """
+        Indique si une réponse désigne la valeur attendue.
+        La réponse est refusée si un autre nom en est strictement plus proche.
+        Args:
+            guess: Réponse saisie
+            expected: Valeur attendue (ex: slug du Pokémon)
+            max_distance: Distance maximale (par défaut selon la longueur de la réponse)
+        """
+        if max_distance is None:
+            max_distance = allowed_distance(normalize_answer(guess), self.max_distance)
+        results = self.lookup(guess, max_distance)
+        if not results:
+            return False
+        best_distance = results[0][1]
+        return any(value == expected and distance == best_distance for value, distance in results)
+
+    def __contains__(self, value):
+        return value in self._known_values
+
+    def __len__(self):
+        return len(self._values)
+
+
+def matcher_from_names(names_by_value, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    Construit un AnswerMatcher à partir d'un dictionnaire valeur -> noms acceptés.
+    """
+    matcher = AnswerMatcher(max_distance)
+    for value, names in names_by_value.items():
+        matcher.add(value, value)
+        for name in names:
+            if name:
+                matcher.add(name, value)
+    return matcher
+
+
+_pokemon_matcher = None
+_pokemon_matcher_lock = threading.Lock()
+
+
+def get_pokemon_matcher():
+    """
+    Retourne l'index approché de tous les noms d'espèces dans toutes les langues.
+    Returns:
+        L'AnswerMatcher, ou None si l'index des noms n'a pas encore été construit
+    """
+    global _pokemon_matcher
+    if _pokemon_matcher is None:
+        index = get_name_index(build=False)
+        if index is None:
+            return None
+        with _pokemon_matcher_lock:
+            if _pokemon_matcher is None:
+                _pokemon_matcher = matcher_from_names(
+                    {slug: index.names_of(slug).values() for slug in index.slugs()}
+                )
+    return _pokemon_matcher
+
+
+_ability_matcher = None
+_ability_matcher_lock = threading.Lock()
+
+
+def get_ability_matcher():
+    """
+    Retourne l'index approché de tous les noms de talents dans toutes les langues.
+    Returns:
+        L'AnswerMatcher, ou None si tous les talents n'ont pas encore été chargés
+    """
+    global _ability_matcher
+    if _ability_matcher is None:
+        store = get_ability_store()
+        if not store.complete:
+            return None
+        with _ability_matcher_lock:
+            if _ability_matcher is None:
+                _ability_matcher = matcher_from_names(
+                    {record.name: record.names.values() for record in store.records()}
+                )
+    return _ability_matcher
+
+
+def is_pokemon_answer(guess, species_name, names=()):
+    """
+    Vérifie la réponse à un quiz « quel est ce Pokémon ».
+    Args:
+        guess: Réponse saisie
+        species_name: Slug de l'espèce attendue (ex: "charizard")
+        names: Noms acceptés pour l'espèce, utilisés si l'index global n'est pas disponible
+    Returns:
+        True si la réponse désigne l'espèce, fautes de frappe comprises
+    """
+    matcher = get_pokemon_matcher()
+    if matcher is None or species_name not in get_name_index(build=False):
+        matcher = matcher_from_names({species_name: names})
+    return matcher.matches(guess, species_name)
+
+
+def is_ability_answer(guess, ability_name, names=()):
+    """
+    Vérifie la réponse à un quiz sur les talents.
+    Args:
+        guess: Réponse saisie
+        ability_name: Slug du talent attendu (ex: "blaze")
+        names: Noms acceptés pour le talent, utilisés si tous les talents ne sont pas chargés
+    """
+    matcher = get_ability_matcher()
+    if matcher is None or ability_name not in matcher:
+        matcher = matcher_from_names({ability_name: names})
+    return matcher.matches(guess, ability_name)
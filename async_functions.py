@@ -0,0 +1,154 @@
+import asyncio
+import functools
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import simple_functions
+from http_client import DEFAULT_POOL_SIZE
+
+# Au-delà de la taille du pool de connexions, les requêtes supplémentaires
+# ouvriraient des connexions jetables : on s'aligne dessus par défaut.
+DEFAULT_CONCURRENCY = DEFAULT_POOL_SIZE
+MAX_WORKERS = 64
+
+BatchResult = namedtuple("BatchResult", ["name", "value", "error"])
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="pokessential")
+    return _executor
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """
+    Exécute une fonction bloquante dans le pool de threads partagé.
+    Les appels passent par le même client HTTP et les mêmes caches que la version synchrone.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _async_version(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_thread(func, *args, **kwargs)
+
+    wrapper.__name__ = wrapper.__qualname__ = f"{func.__name__}_async"
+    return wrapper
+
+
+get_poke_sprite_async = _async_version(simple_functions.get_poke_sprite)
+import_all_learned_moves_async = _async_version(simple_functions.import_all_learned_moves)
+get_pokemon_types_async = _async_version(simple_functions.get_pokemon_types)
+get_pokemon_list_from_types_async = _async_version(simple_functions.get_pokemon_list_from_types)
+get_ability_name_translation_async = _async_version(simple_functions.get_ability_name_translation)
+get_ability_description_async = _async_version(simple_functions.get_ability_description)
+describe_ability_async = _async_version(simple_functions.describe_ability)
+get_pokemon_name_list_async = _async_version(simple_functions.get_pokemon_name_list)
+get_pokemon_name_translation_async = _async_version(simple_functions.get_pokemon_name_translation)
+download_pokemon_cry_async = _async_version(simple_functions.download_pokemon_cry)
+get_pokemon_cry_file_async = _async_version(simple_functions.get_pokemon_cry_file)
+get_pokemon_base_stats_async = _async_version(simple_functions.get_pokemon_base_stats)
+get_pokemon_height_weight_async = _async_version(simple_functions.get_pokemon_height_weight)
+get_pokemon_abilities_async = _async_version(simple_functions.get_pokemon_abilities)
+get_pokeball_list_async = _async_version(simple_functions.get_pokeball_list)
+get_pokeball_sprite_async = _async_version(simple_functions.get_pokeball_sprite)
+
+
+async def iter_batch(func, names, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """
+    Applique une fonction à une liste de noms en parallèle.
+    Args:
+        func: Fonction synchrone prenant un nom en premier argument
+        names: Noms (ou ids) à traiter
+        concurrency: Nombre maximum d'appels simultanés
+        kwargs: Arguments supplémentaires passés à chaque appel
+    Returns:
+        Itérateur asynchrone de BatchResult(name, value, error), dans l'ordre de fin.
+        Une erreur sur un nom est reportée dans error sans interrompre le lot.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(name):
+        async with semaphore:
+            try:
+                return BatchResult(name, await run_in_thread(func, name, **kwargs), None)
+            except Exception as error:
+                return BatchResult(name, None, error)
+
+    tasks = [asyncio.ensure_future(run_one(name)) for name in names]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def collect_batch(results):
+    """
+    Rassemble les résultats d'un lot.
+    Args:
+        results: Itérateur asynchrone de BatchResult (ex: get_many_pokemon_types(names))
+    Returns:
+        Tuple (dictionnaire nom -> valeur, dictionnaire nom -> exception)
+    """
+    values = {}
+    errors = {}
+    async for result in results:
+        if result.error is None:
+            values[result.name] = result.value
+        else:
+            errors[result.name] = result.error
+    return values, errors
+
+
+def run_batch(func, names, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """
+    Version synchrone de iter_batch pour les appelants hors asyncio.
+    Returns:
+        Tuple (dictionnaire nom -> valeur, dictionnaire nom -> exception)
+    """
+    return asyncio.run(collect_batch(iter_batch(func, names, concurrency, **kwargs)))
+
+
+def get_many_pokemon_types(names, concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(simple_functions.get_pokemon_types, names, concurrency)
+
+
+def get_many_pokemon_base_stats(names, concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(simple_functions.get_pokemon_base_stats, names, concurrency)
+
+
+def get_many_pokemon_height_weight(names, concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(simple_functions.get_pokemon_height_weight, names, concurrency)
+
+
+def get_many_pokemon_abilities(names, concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(simple_functions.get_pokemon_abilities, names, concurrency)
+
+
+def get_many_poke_sprites(names, concurrency=DEFAULT_CONCURRENCY, **sprite_options):
+    """
+    Args:
+        sprite_options: Options de get_poke_sprite (shiny, generation, ...)
+    """
+    return iter_batch(simple_functions.get_poke_sprite, names, concurrency, **sprite_options)
+
+
+def get_many_pokemon_cry_files(names, variant="latest", concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(simple_functions.get_pokemon_cry_file, names, concurrency, variant=variant)
+
+
+def get_many_pokemon_name_translations(names, target_language="fr", concurrency=DEFAULT_CONCURRENCY):
+    return iter_batch(
+        simple_functions.get_pokemon_name_translation, names, concurrency, target_language=target_language
+    )
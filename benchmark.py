@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+# Les modules du projet lisent leurs chemins (POKESSENTIAL_*) à l'import :
+# ils ne sont importés qu'une fois le dossier de cache du benchmark choisi.
+
+DEFAULT_POKEMON = ("pikachu", "bulbasaur", "charizard", "gengar", "eevee", "lucario")
+DEFAULT_ABILITIES = ("static", "overgrow", "blaze", "levitate")
+DEFAULT_POKEBALLS = ("poke-ball", "great-ball", "ultra-ball")
+DEFAULT_TYPE_PAIRS = (("fire", None), ("water", "ground"), ("dragon", "flying"))
+DEFAULT_ITERATIONS = 5
+STARTUP_MODULES = ("pokeapi", "simple_functions", "quiz_engine", "quiz_rounds", "window_manager", "quiz_server")
+DEFAULT_STARTUP_RUNS = 5
+
+# Exécutés dans un interpréteur neuf : chaque mesure part d'un import à froid
+_IMPORT_CODE = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+_WINDOW_CODE = """
+import time
+start = time.perf_counter()
+import window_manager
+window_manager._load_tk()
+root = window_manager.tk.Tk()
+manager = window_manager.WindowManager(root)
+manager.show_quiz_menu()
+root.update()
+print(time.perf_counter() - start)
+manager.close()
+"""
+
+BenchmarkCase = namedtuple("BenchmarkCase", ["name", "func", "arguments"])
+BenchmarkResult = namedtuple(
+    "BenchmarkResult", ["name", "calls", "p50", "p99", "mean", "requests", "bytes", "failures"]
+)
+
+
+def percentile(sorted_values, fraction):
+    """
+    Percentile par rang le plus proche d'une liste triée (fraction entre 0 et 1).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def default_cases(pokemon=DEFAULT_POKEMON, abilities=DEFAULT_ABILITIES, pokeballs=DEFAULT_POKEBALLS,
+                  type_pairs=DEFAULT_TYPE_PAIRS):
+    """
+    Retourne les cas mesurés : chaque getter de simple_functions et des manches de quiz sans interface.
+    """
+    import quiz_rounds
+    import simple_functions as sf
+    from quiz_engine import QuizEngine
+
+    single = [(name,) for name in pokemon]
+    engine = QuizEngine()
+
+    def play_round(kind):
+        # Question + correction, comme un bot ou le serveur web (sprite non décodé)
+        question = engine.new_round(kind)
+        return engine.answer(question.id, pokemon[0])
+
+    return [
+        BenchmarkCase("get_poke_sprite", sf.get_poke_sprite, single),
+        BenchmarkCase("get_poke_sprite(gen=3)", lambda name: sf.get_poke_sprite(name, generation=3), single),
+        BenchmarkCase("import_all_learned_moves", sf.import_all_learned_moves, single),
+        BenchmarkCase("get_last_pokemon_generation", sf.get_last_pokemon_generation, single),
+        BenchmarkCase("get_pokemon_types", sf.get_pokemon_types, single),
+        BenchmarkCase("get_pokemon_list_from_types", sf.get_pokemon_list_from_types, list(type_pairs)),
+        BenchmarkCase("get_type_effectiveness", lambda t1, t2: sf.get_type_effectiveness("ice", t1, t2),
+                      list(type_pairs)),
+        BenchmarkCase("get_pokemon_weaknesses", sf.get_pokemon_weaknesses, single),
+        BenchmarkCase("get_ability_name_translation", sf.get_ability_name_translation, [(a,) for a in abilities]),
+        BenchmarkCase("get_ability_description", sf.get_ability_description, [(a,) for a in abilities]),
+        BenchmarkCase("describe_ability", sf.describe_ability, [(a,) for a in abilities]),
+        BenchmarkCase("get_pokemon_name_list", sf.get_pokemon_name_list, single),
+        BenchmarkCase("get_pokemon_name_translation", sf.get_pokemon_name_translation, single),
+        BenchmarkCase("get_pokemon_slug", sf.get_pokemon_slug, single),
+        BenchmarkCase("download_pokemon_cry", sf.download_pokemon_cry, single),
+        BenchmarkCase("get_pokemon_cry_file", sf.get_pokemon_cry_file, single),
+        BenchmarkCase("get_pokemon_base_stats", sf.get_pokemon_base_stats, single),
+        BenchmarkCase("get_pokemon_height_weight", sf.get_pokemon_height_weight, single),
+        BenchmarkCase("get_pokemon_abilities", sf.get_pokemon_abilities, single),
+        BenchmarkCase("get_pokeball_list", sf.get_pokeball_list, [()]),
+        BenchmarkCase("get_pokeball_sprite", sf.get_pokeball_sprite, [(b,) for b in pokeballs]),
+        BenchmarkCase("quiz: type round", quiz_rounds.build_type_round, [()]),
+        BenchmarkCase("quiz: sprite round", quiz_rounds.build_sprite_round, [()]),
+        BenchmarkCase("quiz: ability round", quiz_rounds.build_ability_round, [()]),
+        BenchmarkCase("engine: types round+answer", play_round, [("types",)]),
+        BenchmarkCase("engine: sprite round+answer", play_round, [("sprite",)]),
+        BenchmarkCase("engine: ability round+answer", play_round, [("ability",)]),
+    ]
+
+
+def run_case(case, server, iterations=DEFAULT_ITERATIONS, cold=False):
+    """
+    Mesure un cas : chaque jeu d'arguments est appelé iterations fois.
+    Args:
+        case: BenchmarkCase
+        server: FakePokeApi dont les compteurs donnent requêtes et octets
+        iterations: Nombre de passes sur les arguments
+        cold: Vider le cache des records avant chaque appel
+    Returns:
+        BenchmarkResult (latences en millisecondes, requêtes et octets par appel)
+    """
+    import pokeapi
+
+    durations = []
+    failures = 0
+    server.reset_stats()
+    for _ in range(iterations):
+        for arguments in case.arguments:
+            if cold:
+                pokeapi.clear_record_cache()
+            start = time.perf_counter()
+            try:
+                case.func(*arguments)
+            except Exception:
+                failures += 1
+            durations.append((time.perf_counter() - start) * 1000)
+    stats = server.stats()
+    calls = len(durations)
+    durations.sort()
+    return BenchmarkResult(
+        case.name,
+        calls,
+        percentile(durations, 0.5),
+        percentile(durations, 0.99),
+        sum(durations) / calls if calls else 0.0,
+        stats["requests"] / calls if calls else 0.0,
+        stats["bytes"] / calls if calls else 0.0,
+        failures,
+    )
+
+
+def format_results(results):
+    """
+    Met en forme les résultats en tableau texte.
+    """
+    header = (
+        f"{'cas':<34} {'appels':>6} {'p50 ms':>9} {'p99 ms':>9} {'moy ms':>9} "
+        f"{'req/appel':>10} {'octets/appel':>13} {'échecs':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.name:<34} {result.calls:>6} {result.p50:>9.2f} {result.p99:>9.2f} {result.mean:>9.2f} "
+            f"{result.requests:>10.2f} {result.bytes:>13.0f} {result.failures:>6}"
+        )
+    return "\n".join(lines)
+
+
+def run_benchmarks(server, iterations=DEFAULT_ITERATIONS, cold=False, only=None, cases=None, **case_options):
+    """
+    Pointe le client HTTP partagé vers le faux serveur et mesure tous les cas.
+    Args:
+        server: FakePokeApi démarré
+        iterations: Nombre de passes par cas
+        cold: Vider le cache des records avant chaque appel
+        only: Sous-chaîne filtrant les noms de cas
+        cases: Cas à mesurer (par défaut default_cases(**case_options))
+    Returns:
+        Liste de BenchmarkResult
+    """
+    from http_client import PokeClient, set_client
+
+    previous = set_client(PokeClient(base_url=server.api_url))
+    try:
+        cases = cases if cases is not None else default_cases(**case_options)
+        return [
+            run_case(case, server, iterations, cold)
+            for case in cases
+            if only is None or only in case.name
+        ]
+    finally:
+        set_client(previous)
+
+
+def _run_child(code, cwd):
+    # Retourne la durée (secondes) affichée par le processus fils, ou None s'il a échoué
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def _startup_result(name, samples):
+    durations = sorted(sample * 1000 for sample in samples if sample is not None)
+    calls = len(durations)
+    return BenchmarkResult(
+        name,
+        calls,
+        percentile(durations, 0.5),
+        percentile(durations, 0.99),
+        sum(durations) / calls if calls else 0.0,
+        0.0,
+        0.0,
+        len(samples) - calls,
+    )
+
+
+def run_startup_benchmarks(runs=DEFAULT_STARTUP_RUNS, modules=STARTUP_MODULES, window=True):
+    """
+    Mesure le démarrage, chaque essai dans un nouvel interpréteur :
+    import à froid de chaque module, puis temps jusqu'à l'affichage du menu du quiz Tk.
+    Args:
+        runs: Nombre d'essais par mesure
+        modules: Modules dont l'import est mesuré
+        window: Mesurer aussi le temps jusqu'à la première fenêtre (échecs si pas d'affichage)
+    Returns:
+        Liste de BenchmarkResult (latences en millisecondes, sans requêtes)
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    results = [
+        _startup_result(f"import {module}", [_run_child(_IMPORT_CODE.format(module=module), cwd) for _ in range(runs)])
+        for module in modules
+    ]
+    if window:
+        results.append(_startup_result("first quiz window", [_run_child(_WINDOW_CODE, cwd) for _ in range(runs)]))
+    return results
+
+
+def _run_server_benchmarks(args):
+    with tempfile.TemporaryDirectory(prefix="pokessential-bench-") as temp_dir:
+        os.environ["POKESSENTIAL_CACHE_DIR"] = args.cache_dir or temp_dir
+        import pokeapi
+        from fake_pokeapi import FakePokeApi
+
+        if args.http_cache:
+            pokeapi.enable_http_cache()
+        with FakePokeApi(args.snapshot, args.fixtures, args.latency, args.jitter, args.error_rate, seed=0) as server:
+            results = run_benchmarks(
+                server, args.iterations, args.cold, args.only,
+                pokemon=args.pokemon, abilities=args.abilities, pokeballs=args.pokeballs,
+            )
+        pokeapi.disable_http_cache()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout sur un faux serveur PokéAPI")
+    parser.add_argument("--snapshot", help="Snapshot SQLite à rejouer (voir snapshot.py mirror)")
+    parser.add_argument("--fixtures", help="Dossier de fixtures à rejouer (voir fake_pokeapi.py record)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai injecté par requête (secondes)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Délai aléatoire supplémentaire (secondes)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 503 injectées")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--cold", action="store_true", help="Vider le cache des records avant chaque appel")
+    parser.add_argument("--http-cache", action="store_true", help="Activer le cache HTTP persistant")
+    parser.add_argument("--only", help="Ne mesurer que les cas dont le nom contient ce texte")
+    parser.add_argument("--cache-dir", help="Dossier de cache (par défaut un dossier temporaire vide)")
+    parser.add_argument("--pokemon", nargs="+", default=DEFAULT_POKEMON, help="Pokémon utilisés par les getters")
+    parser.add_argument("--abilities", nargs="+", default=DEFAULT_ABILITIES)
+    parser.add_argument("--pokeballs", nargs="+", default=DEFAULT_POKEBALLS)
+    parser.add_argument("--json", action="store_true", help="Sortie JSON (une ligne par cas)")
+    parser.add_argument("--startup", action="store_true",
+                        help="Mesurer le démarrage (imports à froid, première fenêtre) au lieu des getters")
+    parser.add_argument("--no-window", action="store_true", help="Avec --startup : ne pas ouvrir de fenêtre Tk")
+    args = parser.parse_args(argv)
+    if args.startup:
+        results = run_startup_benchmarks(args.iterations, window=not args.no_window)
+    elif not args.snapshot and not args.fixtures:
+        parser.error("--snapshot ou --fixtures est nécessaire")
+    else:
+        results = _run_server_benchmarks(args)
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result._asdict()))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
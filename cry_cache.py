@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from http_client import DEFAULT_POOL_SIZE, get_client
+from pokeapi import CACHE_DIR, get_pokemon_record
+from roster import get_roster
+
+CRY_DIR = os.environ.get("POKESSENTIAL_CRY_DIR", os.path.join(CACHE_DIR, "cries"))
+CRY_VARIANTS = ("latest", "legacy")
+DOWNLOAD_WORKERS = DEFAULT_POOL_SIZE
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+
+class CryCache:
+    """
+    Cache disque des cris de Pokémon, adressé par contenu.
+
+    blobs/ : un fichier .ogg par contenu distinct, nommé d'après son sha256
+    (les formes qui partagent un cri ne le stockent qu'une fois).
+    refs/ : pour chaque URL déjà téléchargée, le sha256 de son contenu.
+    """
+
+    def __init__(self, directory=CRY_DIR, workers=DOWNLOAD_WORKERS):
+        """
+        Args:
+            directory: Dossier du cache
+            workers: Nombre de téléchargements simultanés pour download_all et prefetch
+        """
+        self.directory = directory
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest + ".ogg")
+
+    def _ref_path(self, url):
+        key = _digest(url.encode("utf-8"))
+        return os.path.join(self.directory, "refs", key[:2], key)
+
+    def cry_url(self, pokemon_name, variant="latest"):
+        """
+        Retourne l'URL du cri d'un Pokémon.
+        Args:
+            pokemon_name: Nom du Pokémon
+            variant: "latest" (cri actuel) ou "legacy" (cri des anciens jeux)
+        Returns:
+            URL du fichier .ogg, ou None si cette variante n'existe pas pour ce Pokémon
+        """
+        if variant not in CRY_VARIANTS:
+            raise ValueError(f"Variante de cri inconnue : {variant}")
+        return get_pokemon_record(pokemon_name)["cries"].get(variant)
+
+    def path_for_url(self, url):
+        """
+        Retourne le chemin local d'un cri, téléchargé une seule fois.
+        """
+        ref_path = self._ref_path(url)
+        try:
+            with open(ref_path, encoding="ascii") as file:
+                path = self._blob_path(file.read().strip())
+            if os.path.exists(path):
+                metrics.record_cache("cry_disk", True)
+                return path
+        except FileNotFoundError:
+            pass
+        metrics.record_cache("cry_disk", False)
+        data = get_client().get_bytes(url)
+        digest = _digest(data)
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        _write_atomic(ref_path, digest.encode("ascii"))
+        return path
+
+    def get_path(self, pokemon_name, variant="latest"):
+        """
+        Retourne le chemin local du cri d'un Pokémon, ou None si cette variante n'existe pas.
+        """
+        url = self.cry_url(pokemon_name, variant)
+        return self.path_for_url(url) if url else None
+
+    def get_bytes(self, pokemon_name, variant="latest"):
+        """
+        Retourne le contenu du cri d'un Pokémon, ou None si cette variante n'existe pas.
+        """
+        path = self.get_path(pokemon_name, variant)
+        if path is None:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cries")
+        return self._executor
+
+    def prefetch(self, pokemon_names, variant="latest"):
+        """
+        Lance en arrière-plan le téléchargement des cris à venir (ex: prochaines manches de quiz).
+        Returns:
+            Dictionnaire nom -> Future du chemin local
+        """
+        executor = self._get_executor()
+        return {name: executor.submit(self.get_path, name, variant) for name in pokemon_names}
+
+    def download_all(self, pokemon_names, variant="latest"):
+        """
+        Télécharge les cris de plusieurs Pokémon en parallèle et attend la fin.
+        Returns:
+            Tuple (dictionnaire nom -> chemin local, dictionnaire nom -> exception)
+        """
+        paths = {}
+        errors = {}
+        for name, future in self.prefetch(pokemon_names, variant).items():
+            try:
+                path = future.result()
+            except Exception as error:
+                errors[name] = error
+            else:
+                if path is not None:
+                    paths[name] = path
+        return paths, errors
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_cry_cache = None
+_cry_cache_lock = threading.Lock()
+
+
+def get_cry_cache():
+    """
+    Retourne le cache de cris partagé.
+    """
+    global _cry_cache
+    if _cry_cache is None:
+        with _cry_cache_lock:
+            if _cry_cache is None:
+                _cry_cache = CryCache()
+    return _cry_cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache des cris de Pokémon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    download_parser = subparsers.add_parser("download", help="Télécharge les cris de tout le Pokédex")
+    download_parser.add_argument("--variant", choices=CRY_VARIANTS, default="latest")
+    download_parser.add_argument("--forms", action="store_true", help="Inclure les formes alternatives")
+    args = parser.parse_args(argv)
+
+    if args.command == "download":
+        cache = get_cry_cache()
+        names = [entry.slug for entry in get_roster().filter(forms=args.forms)]
+        paths, errors = cache.download_all(names, args.variant)
+        print(f"{len(paths)} cris dans {cache.directory} ({len(errors)} erreurs)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
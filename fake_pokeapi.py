@@ -0,0 +1,432 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pokeapi
+from http_client import get_client
+from snapshot import Snapshot
+
+# URLs présentes dans les données enregistrées, réécrites vers le serveur local
+LIVE_API_URL = "https://pokeapi.co/api/v2"
+LIVE_SPRITES_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master"
+LIVE_CRIES_URL = "https://raw.githubusercontent.com/PokeAPI/cries/main"
+API_PREFIX = "/api/v2"
+SPRITES_PREFIX = "/sprites"
+CRIES_PREFIX = "/cries"
+
+FIXTURE_TYPES = (
+    "normal", "fighting", "flying", "poison", "ground", "rock",
+    "bug", "ghost", "steel", "fire", "water", "grass",
+    "electric", "psychic", "ice", "dragon", "dark", "fairy",
+)
+FIXTURE_POKEBALL_CATEGORIES = (33, 34, 39)
+FIXTURE_SPRITES = (
+    ("front_default",),
+    ("front_shiny",),
+    ("other", "home", "front_default"),
+    ("other", "official-artwork", "front_default"),
+)
+FIXTURE_CRY_VARIANTS = ("latest", "legacy")
+PLACEHOLDER_SIZE = 96
+PLACEHOLDER_CRY_SIZE = 256
+
+
+def placeholder_png(seed, size=PLACEHOLDER_SIZE):
+    """
+    Génère un PNG RGBA valide (un carré de couleur sur fond transparent),
+    servi à la place des sprites non enregistrés.
+    """
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    color = bytes(digest[:3]) + b"\xff"
+    quarter = size // 4
+    rows = []
+    for y in range(size):
+        inside = quarter <= y < size - quarter
+        pixels = b"".join(
+            color if inside and quarter <= x < size - quarter else b"\x00\x00\x00\x00" for x in range(size)
+        )
+        rows.append(b"\x00" + pixels)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)
+    image_data = zlib.compress(b"".join(rows))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", image_data) + chunk(b"IEND", b"")
+
+
+def _ogg_crc(data):
+    # CRC-32 des pages Ogg : polynôme 0x04c11db7, non réfléchi, valeur initiale 0
+    crc = 0
+    for byte in data:
+        crc ^= byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+            crc &= 0xFFFFFFFF
+    return crc
+
+
+def placeholder_ogg(seed, size=PLACEHOLDER_CRY_SIZE):
+    """
+    Génère un fichier Ogg valide (une seule page, début et fin du flux),
+    servi à la place des cris non enregistrés. Son contenu dépend de seed :
+    deux cris différents ne sont pas confondus par le cache adressé par contenu.
+    """
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    packet = (digest * (size // len(digest) + 1))[:size]
+    segments = [255] * (len(packet) // 255) + [len(packet) % 255]
+    serial = struct.unpack("<I", digest[:4])[0]
+    header = struct.pack("<4sBBqIIIB", b"OggS", 0, 0x02 | 0x04, 0, serial, 0, 0, len(segments))
+    page = header + bytes(segments) + packet
+    return page[:22] + struct.pack("<I", _ogg_crc(page)) + page[26:]
+
+
+class Fixtures:
+    """
+    Données enregistrées : <dossier>/<endpoint>/<nom>.json, <dossier>/sprites/<chemin>
+    et <dossier>/cries/<chemin>.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._index = {}  # endpoint -> {nom ou id -> chemin}
+        self._lists = {}  # endpoint -> [(id, nom)]
+        for endpoint in os.listdir(directory):
+            endpoint_dir = os.path.join(directory, endpoint)
+            if endpoint in ("sprites", "cries") or not os.path.isdir(endpoint_dir):
+                continue
+            index = self._index[endpoint] = {}
+            entries = []
+            for filename in os.listdir(endpoint_dir):
+                path = os.path.join(endpoint_dir, filename)
+                with open(path, encoding="utf-8") as file:
+                    data = json.load(file)
+                index[data["name"]] = index[str(data["id"])] = path
+                entries.append((data["id"], data["name"]))
+            self._lists[endpoint] = sorted(entries)
+
+    def get(self, endpoint, name):
+        path = self._index.get(endpoint, {}).get(name)
+        if path is None:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def list(self, endpoint):
+        return self._lists.get(endpoint, [])
+
+    def _file(self, kind, path):
+        parts = path.split("/")
+        if ".." in parts:
+            return None
+        full_path = os.path.join(self.directory, kind, *parts)
+        try:
+            with open(full_path, "rb") as file:
+                return file.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    def sprite(self, path):
+        return self._file("sprites", path)
+
+    def cry(self, path):
+        return self._file("cries", path)
+
+
+class FakePokeApi:
+    """
+    Serveur HTTP local qui rejoue des données PokéAPI enregistrées
+    (snapshot SQLite et/ou dossier de fixtures), avec latence et erreurs injectées.
+
+    Les URLs des réponses sont réécrites vers le serveur local : un client
+    pointé sur api_url ne sort jamais vers pokeapi.co.
+    """
+
+    def __init__(self, snapshot_path=None, fixtures_dir=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 placeholder_sprites=True, host="127.0.0.1", port=0, seed=None):
+        """
+        Args:
+            snapshot_path: Snapshot SQLite (voir snapshot.py mirror)
+            fixtures_dir: Dossier de fixtures (voir record)
+            latency: Délai ajouté à chaque réponse, en secondes
+            jitter: Délai aléatoire supplémentaire maximum, en secondes
+            error_rate: Proportion de requêtes répondues par une erreur 503
+            placeholder_sprites: Générer un PNG (ou un Ogg) pour les sprites et cris non enregistrés
+            host: Adresse d'écoute
+            port: Port d'écoute (0 : choisi par le système)
+            seed: Graine du tirage des erreurs et du jitter
+        """
+        self.snapshot = Snapshot(snapshot_path) if snapshot_path else None
+        self.fixtures = Fixtures(fixtures_dir) if fixtures_dir else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.placeholder_sprites = placeholder_sprites
+        self._rng = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "bytes": 0, "errors": 0, "not_modified": 0, "not_found": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        host, port = self._server.server_address[:2]
+        self.base_url = f"http://{host}:{port}"
+        self.api_url = self.base_url + API_PREFIX
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # En-têtes et corps partent dans le même paquet (pas d'attente d'ACK retardé)
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _rewrite(self, body):
+        return (
+            body.replace(LIVE_API_URL.encode(), self.api_url.encode())
+            .replace(LIVE_SPRITES_URL.encode(), (self.base_url + SPRITES_PREFIX).encode())
+            .replace(LIVE_CRIES_URL.encode(), (self.base_url + CRIES_PREFIX).encode())
+        )
+
+    def _resource(self, endpoint, name):
+        body = self.fixtures.get(endpoint, name) if self.fixtures else None
+        if body is None and self.snapshot is not None:
+            data = self.snapshot.get(endpoint, name)
+            if data is not None:
+                body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return body
+
+    def _list(self, endpoint, query):
+        entries = {}
+        if self.snapshot is not None:
+            entries.update(
+                (pokeapi.resource_id(entry["url"]), entry["name"]) for entry in self.snapshot.list(endpoint)
+            )
+        if self.fixtures is not None:
+            entries.update(self.fixtures.list(endpoint))
+        limit = int(query.get("limit", ["20"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        ordered = sorted(entries.items())
+        results = [
+            {"name": name, "url": f"{LIVE_API_URL}/{endpoint}/{resource_id}/"}
+            for resource_id, name in ordered[offset:offset + limit]
+        ]
+        data = {"count": len(ordered), "next": None, "previous": None, "results": results}
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def _sprite(self, path):
+        body = self.fixtures.sprite(path) if self.fixtures else None
+        if body is None and self.placeholder_sprites and path.endswith(".png"):
+            body = placeholder_png(path)
+        return body
+
+    def _cry(self, path):
+        body = self.fixtures.cry(path) if self.fixtures else None
+        if body is None and self.placeholder_sprites and path.endswith(".ogg"):
+            body = placeholder_ogg(path)
+        return body
+
+    def _route(self, path, query):
+        if path.startswith(SPRITES_PREFIX + "/"):
+            return self._sprite(path[len(SPRITES_PREFIX) + 1:]), "image/png"
+        if path.startswith(CRIES_PREFIX + "/"):
+            return self._cry(path[len(CRIES_PREFIX) + 1:]), "audio/ogg"
+        if not path.startswith(API_PREFIX + "/"):
+            return None, None
+        parts = [part for part in path[len(API_PREFIX):].split("/") if part]
+        if len(parts) == 1:
+            return self._rewrite(self._list(parts[0], query)), "application/json"
+        if len(parts) == 2:
+            body = self._resource(parts[0], pokeapi.normalize_key(parts[1]))
+            return (self._rewrite(body) if body is not None else None), "application/json"
+        return None, None
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _handle(self, request):
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self._count(requests=1, errors=1)
+            self._send(request, 503, b"", "text/plain")
+            return
+
+        url = urlsplit(request.path)
+        body, content_type = self._route(url.path, parse_qs(url.query))
+        if body is None:
+            self._count(requests=1, not_found=1)
+            self._send(request, 404, b"Not Found", "text/plain")
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            self._count(requests=1, not_modified=1)
+            self._send(request, 304, b"", content_type, etag)
+            return
+        self._count(requests=1, bytes=len(body))
+        self._send(request, 200, body, content_type, etag)
+
+    def _send(self, request, status, body, content_type, etag=None):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        if etag:
+            request.send_header("ETag", etag)
+        request.end_headers()
+        if body and request.command != "HEAD":
+            request.wfile.write(body)
+
+    def stats(self):
+        """
+        Retourne les compteurs du serveur (requêtes, octets envoyés, erreurs injectées, 304, 404).
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-pokeapi", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Sert les requêtes dans le thread courant (jusqu'à stop() ou Ctrl+C).
+        """
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _save_fixture(directory, endpoint, data):
+    endpoint_dir = os.path.join(directory, endpoint)
+    os.makedirs(endpoint_dir, exist_ok=True)
+    with open(os.path.join(endpoint_dir, f"{data['name']}.json"), "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+
+
+def _sprite_urls(sprites):
+    for path in FIXTURE_SPRITES:
+        value = sprites
+        for key in path:
+            value = (value or {}).get(key)
+        if value:
+            yield value
+
+
+def _save_file(directory, kind, live_url, url, client):
+    # URL live -> <dossier>/<kind>/<chemin>, au même chemin que celui servi par FakePokeApi
+    if not url.startswith(live_url):
+        return
+    path = os.path.join(directory, kind, *url[len(live_url) + 1:].split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(client.get_bytes(url))
+
+
+def record(directory, pokemon_names, log=print):
+    """
+    Enregistre depuis PokéAPI les données nécessaires aux benchmarks pour quelques Pokémon :
+    Pokémon, espèces, talents, cris, les 18 types, les Poké Balls et les principaux sprites.
+    Args:
+        directory: Dossier de fixtures à écrire
+        pokemon_names: Noms des Pokémon à enregistrer
+        log: Fonction d'affichage de la progression (None pour rien afficher)
+    """
+    client = get_client()
+    abilities = set()
+    for name in pokemon_names:
+        poke = pokeapi.fetch_json(f"pokemon/{pokeapi.normalize_key(name)}")
+        _save_fixture(directory, "pokemon", poke)
+        _save_fixture(directory, "pokemon-species", pokeapi.fetch_json(poke["species"]["url"]))
+        abilities.update(entry["ability"]["url"] for entry in poke["abilities"])
+        for url in _sprite_urls(poke["sprites"]):
+            _save_file(directory, "sprites", LIVE_SPRITES_URL, url, client)
+        for variant in FIXTURE_CRY_VARIANTS:
+            url = (poke.get("cries") or {}).get(variant)
+            if url:
+                _save_file(directory, "cries", LIVE_CRIES_URL, url, client)
+        if log:
+            log(f"pokemon: {poke['name']}")
+    for url in sorted(abilities):
+        _save_fixture(directory, "ability", pokeapi.fetch_json(url))
+    for type_name in FIXTURE_TYPES:
+        _save_fixture(directory, "type", pokeapi.fetch_json(f"type/{type_name}"))
+    for category_id in FIXTURE_POKEBALL_CATEGORIES:
+        category = pokeapi.fetch_json(f"item-category/{category_id}")
+        _save_fixture(directory, "item-category", category)
+        for item in category["items"]:
+            _save_fixture(directory, "item", pokeapi.fetch_json(item["url"]))
+    if log:
+        log(f"Fixtures écrites dans {directory}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faux serveur PokéAPI pour les tests et benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Rejoue un snapshot et/ou des fixtures")
+    serve_parser.add_argument("--snapshot")
+    serve_parser.add_argument("--fixtures")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Délai par requête (secondes)")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="Délai aléatoire supplémentaire (secondes)")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 503")
+    record_parser = subparsers.add_parser("record", help="Enregistre des fixtures depuis PokéAPI")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("pokemon", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if not args.snapshot and not args.fixtures:
+            parser.error("--snapshot ou --fixtures est nécessaire")
+        server = FakePokeApi(args.snapshot, args.fixtures, args.latency, args.jitter, args.error_rate,
+                             host=args.host, port=args.port)
+        print(f"PokéAPI locale sur {server.api_url} (POKESSENTIAL_API_URL={server.api_url})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+    elif args.command == "record":
+        record(args.directory, args.pokemon)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # les données de PokéAPI changent très rarement
+
+CachedResponse = namedtuple("CachedResponse", ["url", "body", "etag", "last_modified", "fetched_at"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class HttpCache:
+    """
+    Cache HTTP persistant (SQLite) pour les réponses JSON de PokéAPI.
+
+    Les corps sont stockés compressés (zlib). Une entrée plus récente que
+    max_age est servie sans réseau ; au-delà elle est revalidée avec
+    ETag / Last-Modified. La taille totale est bornée par max_bytes
+    (éviction des entrées les moins récemment lues).
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, clock=time.time):
+        """
+        Args:
+            path: Chemin du fichier SQLite
+            max_bytes: Taille maximale des corps compressés en octets
+            max_age: Durée en secondes pendant laquelle une entrée est servie sans revalidation
+            clock: Fonction retournant l'heure courante en secondes
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._total_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """
+        Retourne la réponse en cache pour une URL, ou None.
+        Args:
+            url: URL de la ressource
+        Returns:
+            CachedResponse avec le corps décompressé
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (self._clock(), url))
+            self._db.commit()
+        body, etag, last_modified, fetched_at = row
+        return CachedResponse(url, zlib.decompress(body), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        """
+        Indique si une entrée peut être servie sans revalidation.
+        """
+        return self._clock() - entry.fetched_at < self.max_age
+
+    def validators(self, entry):
+        """
+        Retourne les en-têtes de requête conditionnelle pour une entrée.
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Enregistre (ou remplace) la réponse d'une URL.
+        Args:
+            url: URL de la ressource
+            body: Corps brut de la réponse (bytes)
+            etag: En-tête ETag reçu
+            last_modified: En-tête Last-Modified reçu
+        """
+        compressed = zlib.compress(body)
+        now = self._clock()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            if previous:
+                self._total_size -= previous[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, compressed, len(compressed), etag, last_modified, now, now),
+            )
+            self._total_size += len(compressed)
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url):
+        """
+        Marque une entrée comme revalidée (réponse 304).
+        """
+        now = self._clock()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._total_size = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        while self._total_size > self.max_bytes:
+            row = self._db.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (row[0],))
+            self._total_size -= row[1]
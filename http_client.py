@@ -0,0 +1,179 @@
+import os
+import random
+import sys
+import threading
+import time
+
+import metrics
+
+API_URL = os.environ.get("POKESSENTIAL_API_URL", "https://pokeapi.co/api/v2").rstrip("/")
+
+DEFAULT_CONNECT_TIMEOUT = 3.05  # secondes
+DEFAULT_READ_TIMEOUT = 10  # secondes
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.3  # secondes, doublé à chaque nouvelle tentative
+DEFAULT_POOL_SIZE = 16
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _requests():
+    # requests (et urllib3, ssl, ...) coûte ~100 ms à l'import : importé à la première requête
+    import requests
+
+    return requests
+
+
+def network_errors():
+    """
+    Retourne les exceptions réseau à intercepter, sans importer requests :
+    tant qu'il n'a pas été importé, aucune requête n'a pu échouer (tuple vide).
+    Exemple : except (*network_errors(), LookupError)
+    """
+    requests = sys.modules.get("requests")
+    return (requests.RequestException,) if requests is not None else ()
+
+
+class PokeClient:
+    """
+    Client HTTP partagé par toutes les fonctions du projet.
+
+    Une seule session requests garde les connexions keep-alive ouvertes
+    (pas de nouvelle poignée de main TLS à chaque requête). Les erreurs
+    transitoires (connexion, timeout, 429, 5xx) sont retentées avec un
+    délai exponentiel aléatoire.
+    """
+
+    def __init__(
+        self,
+        base_url=API_URL,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        pool_size=DEFAULT_POOL_SIZE,
+        session=None,
+        sleep=time.sleep,
+    ):
+        """
+        Args:
+            base_url: URL racine de l'API (ex: serveur local pour les tests)
+            connect_timeout: Délai maximum d'établissement de la connexion
+            read_timeout: Délai maximum entre deux octets reçus
+            retries: Nombre de nouvelles tentatives après une erreur transitoire
+            backoff: Délai de base entre deux tentatives
+            pool_size: Nombre de connexions gardées ouvertes par hôte
+            session: Session requests à utiliser (créée à la première requête si None)
+            sleep: Fonction d'attente (remplaçable dans les tests)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self._pool_size = pool_size
+        self._session = session
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    requests = _requests()
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=self._pool_size, pool_maxsize=self._pool_size
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def url_for(self, path):
+        """
+        Construit l'URL complète d'un chemin de l'API (ex: "pokemon/25").
+        """
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, url, headers=None):
+        """
+        Effectue une requête GET avec timeouts et nouvelles tentatives.
+        Args:
+            url: URL complète, ou chemin relatif à base_url
+            headers: En-têtes supplémentaires
+        Returns:
+            Réponse requests (le statut n'est pas vérifié)
+        """
+        if "://" not in url:
+            url = self.url_for(url)
+        requests = _requests()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.record_request(0, time.perf_counter() - start, retry=attempt > 0)
+                if attempt >= self.retries:
+                    raise
+            else:
+                # Le corps est déjà téléchargé (pas de stream) : len() ne coûte rien
+                metrics.record_request(len(response.content), time.perf_counter() - start, retry=attempt > 0)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                response.close()
+            self._sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            attempt += 1
+
+    def get_json(self, url):
+        """
+        Effectue une requête GET et décode la réponse JSON.
+        """
+        response = self.get(url)
+        response.raise_for_status()
+        start = time.perf_counter()
+        data = response.json()
+        metrics.record_parse(time.perf_counter() - start)
+        return data
+
+    def get_bytes(self, url):
+        """
+        Effectue une requête GET et retourne le corps brut (images, sons).
+        """
+        response = self.get(url)
+        response.raise_for_status()
+        return response.content
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Retourne le client HTTP partagé (créé au premier appel).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PokeClient()
+    return _client
+
+
+def set_client(client):
+    """
+    Remplace le client HTTP partagé (ex: client pointant vers un faux serveur).
+    Args:
+        client: Nouveau PokeClient, ou None pour revenir au client par défaut
+    Returns:
+        Le client précédent
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
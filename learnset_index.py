@@ -0,0 +1,285 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pokeapi import CACHE_DIR, get_pokemon_record, get_resource, normalize_key
+from roster import generation_number, get_roster
+
+LEARNSET_INDEX_PATH = os.environ.get("POKESSENTIAL_LEARNSET_INDEX", os.path.join(CACHE_DIR, "learnsets.json.gz"))
+BUILD_WORKERS = 8
+
+# Les groupes de versions absents de cette table sont résolus via /version-group/{name}
+VERSION_GROUP_GENERATION = {
+    "red-blue": 1, "yellow": 1, "red-green-japan": 1, "blue-japan": 1,
+    "gold-silver": 2, "crystal": 2,
+    "ruby-sapphire": 3, "emerald": 3, "firered-leafgreen": 3, "colosseum": 3, "xd": 3,
+    "diamond-pearl": 4, "platinum": 4, "heartgold-soulsilver": 4,
+    "black-white": 5, "black-2-white-2": 5,
+    "x-y": 6, "omega-ruby-alpha-sapphire": 6,
+    "sun-moon": 7, "ultra-sun-ultra-moon": 7, "lets-go-pikachu-lets-go-eevee": 7,
+    "sword-shield": 8, "the-isle-of-armor": 8, "the-crown-tundra": 8,
+    "brilliant-diamond-and-shining-pearl": 8, "legends-arceus": 8,
+    "scarlet-violet": 9, "the-teal-mask": 9, "the-indigo-disk": 9,
+}
+
+# Une entrée de learnset = un entier : attaque << 24 | groupe de versions << 16 | méthode << 8 | niveau
+_MOVE_SHIFT = 24
+_VERSION_GROUP_SHIFT = 16
+_METHOD_SHIFT = 8
+_BYTE = 0xFF
+
+
+def version_group_generation(version_group):
+    """
+    Retourne la génération d'un groupe de versions (ex: "emerald" -> 3).
+    """
+    generation = VERSION_GROUP_GENERATION.get(version_group)
+    if generation is None:
+        generation = generation_number(get_resource("version-group", version_group)["generation"]["name"])
+        VERSION_GROUP_GENERATION[version_group] = generation
+    return generation
+
+
+class LearnsetIndex:
+    """
+    Attaques apprises par chaque Pokémon, par génération et par méthode.
+
+    Attaques, groupes de versions et méthodes sont numérotés une fois ;
+    chaque learnset est une liste d'entiers. Deux dictionnaires répondent
+    aux requêtes : (Pokémon, génération) -> attaques et (attaque, génération)
+    -> Pokémon.
+    """
+
+    def __init__(self, moves=(), version_groups=(), methods=(), learnsets=None, complete=False):
+        """
+        Args:
+            moves: Noms des attaques, l'indice servant de code
+            version_groups: Noms des groupes de versions, l'indice servant de code
+            methods: Noms des méthodes d'apprentissage ("level-up", "machine", ...)
+            learnsets: Dictionnaire nom du Pokémon -> [id, liste des entrées encodées]
+            complete: True si learnsets contient tout le Pokédex
+        """
+        self.moves = list(moves)
+        self.version_groups = list(version_groups)
+        self.methods = list(methods)
+        self.complete = complete
+        self._codes = {
+            "moves": {name: code for code, name in enumerate(self.moves)},
+            "version_groups": {name: code for code, name in enumerate(self.version_groups)},
+            "methods": {name: code for code, name in enumerate(self.methods)},
+        }
+        self._generations = [version_group_generation(name) for name in self.version_groups]
+        self._learnsets = {}
+        self._ids = {}
+        self._by_pokemon = {}  # (nom, génération) -> liste de (attaque, méthode)
+        self._by_move = {}  # (attaque, génération) -> liste de (nom, méthode)
+        self._lock = threading.RLock()
+        for pokemon_name, (poke_id, entries) in (learnsets or {}).items():
+            self._add(pokemon_name, poke_id, entries)
+
+    def _code(self, table, name):
+        codes = self._codes[table]
+        code = codes.get(name)
+        if code is None:
+            values = getattr(self, table)
+            code = codes[name] = len(values)
+            values.append(name)
+            if table == "version_groups":
+                self._generations.append(version_group_generation(name))
+        return code
+
+    def _add(self, pokemon_name, poke_id, entries):
+        self._learnsets[pokemon_name] = entries
+        self._ids[str(poke_id)] = pokemon_name
+        seen = set()
+        for entry in entries:
+            move = entry >> _MOVE_SHIFT
+            generation = self._generations[entry >> _VERSION_GROUP_SHIFT & _BYTE]
+            method = entry >> _METHOD_SHIFT & _BYTE
+            if (move, generation, method) in seen:
+                continue
+            seen.add((move, generation, method))
+            self._by_pokemon.setdefault((pokemon_name, generation), []).append((move, method))
+            self._by_move.setdefault((move, generation), []).append((pokemon_name, method))
+
+    def add_record(self, poke):
+        """
+        Ajoute le learnset d'une réponse /pokemon/{name}.
+        """
+        with self._lock:
+            if poke["name"] in self._learnsets:
+                return
+            entries = []
+            for move in poke["moves"]:
+                move_code = self._code("moves", move["move"]["name"])
+                for detail in move["version_group_details"]:
+                    entries.append(
+                        move_code << _MOVE_SHIFT
+                        | self._code("version_groups", detail["version_group"]["name"]) << _VERSION_GROUP_SHIFT
+                        | self._code("methods", detail["move_learn_method"]["name"]) << _METHOD_SHIFT
+                        | min(detail["level_learned_at"], _BYTE)
+                    )
+            self._add(poke["name"], poke["id"], entries)
+
+    def _pokemon_key(self, pokemon_name):
+        """
+        Retourne le nom sous lequel un Pokémon est indexé, en chargeant son learnset si besoin.
+        """
+        key = normalize_key(pokemon_name)
+        key = self._ids.get(key, key)
+        if key not in self._learnsets:
+            if self.complete:
+                raise LookupError(f"Pokémon inconnu : {pokemon_name}")
+            poke = get_pokemon_record(key)
+            self.add_record(poke)
+            key = poke["name"]
+        return key
+
+    def generations_of(self, pokemon_name):
+        """
+        Retourne les générations où un Pokémon apprend des attaques, triées.
+        """
+        key = self._pokemon_key(pokemon_name)
+        return sorted({self._generations[entry >> _VERSION_GROUP_SHIFT & _BYTE] for entry in self._learnsets[key]})
+
+    def last_generation(self, pokemon_name):
+        """
+        Retourne la dernière génération où un Pokémon apprend des attaques, ou None.
+        """
+        generations = self.generations_of(pokemon_name)
+        return generations[-1] if generations else None
+
+    def moves_of(self, pokemon_name, generation=None, method=None):
+        """
+        Retourne les attaques apprises par un Pokémon.
+        Args:
+            pokemon_name: Nom ou id du Pokémon
+            generation: Génération (1-9), None pour la dernière génération du Pokémon
+            method: Méthode d'apprentissage ("level-up", "machine", "egg", "tutor", ...) ou None pour toutes
+        Returns:
+            Liste triée des noms d'attaques
+        """
+        key = self._pokemon_key(pokemon_name)
+        if generation is None:
+            generation = self.last_generation(key)
+        method_code = self._codes["methods"].get(method)
+        if generation is None or (method is not None and method_code is None):
+            return []
+        moves = {
+            move for move, learn_method in self._by_pokemon.get((key, int(generation)), ())
+            if method is None or learn_method == method_code
+        }
+        return sorted(self.moves[move] for move in moves)
+
+    def level_up_moves(self, pokemon_name, version_group):
+        """
+        Retourne les attaques apprises par niveau dans un groupe de versions.
+        Returns:
+            Liste de (niveau, attaque) triée par niveau
+        """
+        key = self._pokemon_key(pokemon_name)
+        version_group_code = self._codes["version_groups"].get(version_group)
+        method_code = self._codes["methods"].get("level-up")
+        return sorted(
+            (entry & _BYTE, self.moves[entry >> _MOVE_SHIFT])
+            for entry in self._learnsets[key]
+            if entry >> _VERSION_GROUP_SHIFT & _BYTE == version_group_code and entry >> _METHOD_SHIFT & _BYTE == method_code
+        )
+
+    def learners(self, move_name, generation, method=None):
+        """
+        Retourne les Pokémon qui apprennent une attaque dans une génération.
+        Args:
+            move_name: Nom de l'attaque (ex: "thunderbolt", "Thunder Bolt")
+            generation: Génération (1-9)
+            method: Méthode d'apprentissage ou None pour toutes
+        Returns:
+            Liste triée des noms de Pokémon
+        """
+        if not self.complete:
+            raise ValueError("Index partiel : lancer `python learnset_index.py build` pour chercher par attaque")
+        move_code = self._codes["moves"].get(normalize_key(move_name))
+        method_code = self._codes["methods"].get(method)
+        if move_code is None or (method is not None and method_code is None):
+            return []
+        return sorted({
+            pokemon_name for pokemon_name, learn_method in self._by_move.get((move_code, int(generation)), ())
+            if method is None or learn_method == method_code
+        })
+
+    def build_all(self, workers=BUILD_WORKERS):
+        """
+        Charge les learnsets de tout le roster.
+        """
+        entries = get_roster().entries
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for poke in executor.map(lambda entry: get_pokemon_record(entry.id), entries):
+                self.add_record(poke)
+        self.complete = True
+
+    @classmethod
+    def load(cls, path=LEARNSET_INDEX_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["moves"], data["version_groups"], data["methods"], data["learnsets"], data["complete"])
+
+    def save(self, path=LEARNSET_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ids = {pokemon_name: poke_id for poke_id, pokemon_name in self._ids.items()}
+        data = {
+            "complete": self.complete,
+            "moves": self.moves,
+            "version_groups": self.version_groups,
+            "methods": self.methods,
+            "learnsets": {name: [int(ids[name]), entries] for name, entries in self._learnsets.items()},
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    def __contains__(self, pokemon_name):
+        key = normalize_key(pokemon_name)
+        return self._ids.get(key, key) in self._learnsets
+
+    def __len__(self):
+        return len(self._learnsets)
+
+
+_learnset_index = None
+_learnset_index_lock = threading.Lock()
+
+
+def get_learnset_index(path=LEARNSET_INDEX_PATH):
+    """
+    Retourne l'index des learnsets : chargé depuis le disque s'il a été construit,
+    sinon rempli au fil des demandes.
+    """
+    global _learnset_index
+    if _learnset_index is None:
+        with _learnset_index_lock:
+            if _learnset_index is None:
+                _learnset_index = LearnsetIndex.load(path) if os.path.exists(path) else LearnsetIndex()
+    return _learnset_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index des attaques apprises")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit l'index pour tout le Pokédex")
+    build_parser.add_argument("path", nargs="?", default=LEARNSET_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = LearnsetIndex()
+        index.build_all()
+        index.save(args.path)
+        print(f"Learnsets de {len(index)} Pokémon écrits dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# POKESSENTIAL_METRICS=0 désactive la collecte (les fonctions décorées sont alors appelées directement)
+ENABLED = os.environ.get("POKESSENTIAL_METRICS", "1") != "0"
+# Bornes (secondes) de l'histogramme des durées d'appel
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PREFIX = "pokessential"
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+class _Counters:
+    """
+    Compteurs d'E/S : requêtes HTTP, octets reçus, temps réseau, temps de décodage JSON, caches.
+    """
+
+    __slots__ = ("requests", "retries", "bytes", "http_seconds", "parse_seconds", "caches")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.bytes = 0
+        self.http_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.caches = {}  # nom du cache -> [succès, échecs]
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.retries += other.retries
+        self.bytes += other.bytes
+        self.http_seconds += other.http_seconds
+        self.parse_seconds += other.parse_seconds
+        for cache, (hits, misses) in other.caches.items():
+            counts = self.caches.setdefault(cache, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "http_seconds": self.http_seconds,
+            "parse_seconds": self.parse_seconds,
+            "cache_hits": {cache: counts[0] for cache, counts in self.caches.items()},
+            "cache_misses": {cache: counts[1] for cache, counts in self.caches.items()},
+        }
+
+
+class _FunctionStats(_Counters):
+    """
+    Compteurs d'une fonction publique, plus le nombre d'appels, d'erreurs et les durées.
+    """
+
+    __slots__ = ("calls", "errors", "seconds", "max_seconds", "buckets")
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def as_dict(self):
+        data = super().as_dict()
+        data.update(
+            calls=self.calls,
+            errors=self.errors,
+            seconds=self.seconds,
+            max_seconds=self.max_seconds,
+            mean_seconds=self.seconds / self.calls if self.calls else 0.0,
+        )
+        return data
+
+
+_functions = {}  # nom -> _FunctionStats
+_totals = _Counters()
+
+
+def _active_frames():
+    return getattr(_local, "frames", None)
+
+
+def _record(update):
+    # Les événements sont comptés pour chaque fonction instrumentée en cours dans ce thread
+    # (chiffres inclusifs) et dans les totaux du processus
+    frames = _active_frames()
+    if frames:
+        for frame in frames:
+            update(frame)
+    with _lock:
+        update(_totals)
+
+
+def instrumented(func=None, *, name=None):
+    """
+    Décorateur : compte appels, erreurs, durée et E/S (requêtes, octets, décodage, caches)
+    d'une fonction publique. Les E/S des fonctions appelées sont incluses.
+    Args:
+        func: Fonction à instrumenter
+        name: Nom exporté (par défaut le nom qualifié de la fonction)
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    metric_name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        frames = _active_frames()
+        if frames is None:
+            frames = _local.frames = []
+        frame = _Counters()
+        frames.append(frame)
+        failed = False
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            frames.pop()
+            with _lock:
+                stats = _functions.get(metric_name)
+                if stats is None:
+                    stats = _functions[metric_name] = _FunctionStats()
+                stats.calls += 1
+                stats.errors += failed
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                stats.buckets[bisect.bisect_left(DURATION_BUCKETS, elapsed)] += 1
+                stats.merge(frame)
+
+    return wrapper
+
+
+def record_request(nbytes, seconds, retry=False):
+    """
+    Compte une requête HTTP (chaque tentative compte).
+    Args:
+        nbytes: Taille du corps reçu
+        seconds: Durée de la requête
+        retry: True si c'est une nouvelle tentative
+    """
+    if not ENABLED:
+        return
+
+    def update(counters):
+        counters.requests += 1
+        counters.retries += retry
+        counters.bytes += nbytes
+        counters.http_seconds += seconds
+
+    _record(update)
+
+
+def record_parse(seconds):
+    """
+    Compte le temps passé à décoder une réponse JSON.
+    """
+    if not ENABLED:
+        return
+
+    def update(counters):
+        counters.parse_seconds += seconds
+
+    _record(update)
+
+
+def record_cache(cache, hit):
+    """
+    Compte un accès à un cache.
+    Args:
+        cache: Nom du cache ("record", "snapshot", "http", "sprite_memory", "sprite_disk", ...)
+        hit: True si la donnée était présente
+    """
+    if not ENABLED:
+        return
+    index = 0 if hit else 1
+
+    def update(counters):
+        counts = counters.caches.get(cache)
+        if counts is None:
+            counts = counters.caches[cache] = [0, 0]
+        counts[index] += 1
+
+    _record(update)
+
+
+def snapshot():
+    """
+    Retourne une copie des statistiques collectées.
+    Returns:
+        Dictionnaire {"functions": {nom: statistiques}, "totals": statistiques du processus}
+    """
+    with _lock:
+        return {
+            "functions": {name: stats.as_dict() for name, stats in sorted(_functions.items())},
+            "totals": _totals.as_dict(),
+        }
+
+
+def reset():
+    """
+    Remet toutes les statistiques à zéro.
+    """
+    global _totals
+    with _lock:
+        _functions.clear()
+        _totals = _Counters()
+
+
+_FUNCTION_COUNTERS = (
+    ("function_http_requests_total", "requests", "Requêtes HTTP par fonction"),
+    ("function_http_retries_total", "retries", "Nouvelles tentatives HTTP par fonction"),
+    ("function_http_bytes_total", "bytes", "Octets reçus par fonction"),
+    ("function_http_seconds_total", "http_seconds", "Temps HTTP par fonction"),
+    ("function_json_parse_seconds_total", "parse_seconds", "Temps de décodage JSON par fonction"),
+)
+_FUNCTION_CACHE_COUNTERS = (
+    ("function_cache_hits_total", "cache_hits", "Accès aux caches réussis par fonction"),
+    ("function_cache_misses_total", "cache_misses", "Accès aux caches manqués par fonction"),
+)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus():
+    """
+    Exporte les statistiques au format texte Prometheus.
+    """
+    with _lock:
+        functions = sorted(_functions.items())
+        totals = _Counters()
+        totals.merge(_totals)
+        buckets = {name: list(stats.buckets) for name, stats in functions}
+        functions = [(name, stats.as_dict()) for name, stats in functions]
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label(label)}"' for key, label in labels)
+            lines.append(f"{PREFIX}_{name}{{{label_text}}} {value}" if label_text else f"{PREFIX}_{name} {value}")
+
+    metric("http_requests_total", "counter", "Requêtes HTTP envoyées", [((), totals.requests)])
+    metric("http_retries_total", "counter", "Nouvelles tentatives HTTP", [((), totals.retries)])
+    metric("http_bytes_total", "counter", "Octets reçus", [((), totals.bytes)])
+    metric("http_seconds_total", "counter", "Temps passé en requêtes HTTP", [((), totals.http_seconds)])
+    metric("json_parse_seconds_total", "counter", "Temps de décodage JSON", [((), totals.parse_seconds)])
+    metric("cache_hits_total", "counter", "Accès aux caches réussis",
+           [((("cache", cache),), counts[0]) for cache, counts in sorted(totals.caches.items())])
+    metric("cache_misses_total", "counter", "Accès aux caches manqués",
+           [((("cache", cache),), counts[1]) for cache, counts in sorted(totals.caches.items())])
+
+    metric("function_calls_total", "counter", "Appels par fonction",
+           [((("function", n),), s["calls"]) for n, s in functions])
+    metric("function_errors_total", "counter", "Erreurs par fonction",
+           [((("function", n),), s["errors"]) for n, s in functions])
+    for name, field, help_text in _FUNCTION_COUNTERS:
+        metric(name, "counter", help_text, [((("function", n),), s[field]) for n, s in functions])
+    for name, field, help_text in _FUNCTION_CACHE_COUNTERS:
+        metric(name, "counter", help_text, [
+            ((("function", n), ("cache", cache)), count)
+            for n, s in functions for cache, count in sorted(s[field].items())
+        ])
+
+    lines.append(f"# HELP {PREFIX}_function_duration_seconds Durée des appels par fonction")
+    lines.append(f"# TYPE {PREFIX}_function_duration_seconds histogram")
+    for name, stats in functions:
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS + (float("inf"),), buckets[name]):
+            cumulative += count
+            bound_text = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(
+                f'{PREFIX}_function_duration_seconds_bucket{{function="{label}",le="{bound_text}"}} {cumulative}'
+            )
+        lines.append(f'{PREFIX}_function_duration_seconds_sum{{function="{label}"}} {stats["seconds"]}')
+        lines.append(f'{PREFIX}_function_duration_seconds_count{{function="{label}"}} {stats["calls"]}')
+    return "\n".join(lines) + "\n"
+
+
+def to_json_lines():
+    """
+    Exporte les statistiques en JSON lines : une ligne par fonction, puis une ligne de totaux.
+    """
+    data = snapshot()
+    lines = [json.dumps({"function": name, **stats}) for name, stats in data["functions"].items()]
+    lines.append(json.dumps({"function": None, **data["totals"]}))
+    return "\n".join(lines) + "\n"
+
+
+def _dump_at_exit(path):
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(to_json_lines())
+
+
+# POKESSENTIAL_METRICS_FILE : fichier où ajouter les statistiques (JSON lines) à la fin du processus
+if ENABLED and os.environ.get("POKESSENTIAL_METRICS_FILE"):
+    atexit.register(_dump_at_exit, os.environ["POKESSENTIAL_METRICS_FILE"])
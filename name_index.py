@@ -0,0 +1,178 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pokeapi import CACHE_DIR, get_resource, list_resources, normalize_key
+
+NAME_INDEX_PATH = os.environ.get("POKESSENTIAL_NAME_INDEX", os.path.join(CACHE_DIR, "names.json.gz"))
+BUILD_WORKERS = 8
+
+
+def normalize_name(name):
+    """
+    Clé de recherche inverse d'un nom localisé (casse et espaces ignorés).
+    """
+    return " ".join(name.split()).casefold()
+
+
+class NameIndex:
+    """
+    Dictionnaire bidirectionnel des noms d'espèces dans toutes les langues de PokéAPI.
+
+    slug -> nom localisé et nom localisé -> slug sont des accès dictionnaire.
+    """
+
+    def __init__(self, languages, species):
+        """
+        Args:
+            languages: Liste des codes de langue (ex: ["en", "fr", ...])
+            species: Liste de tuples (slug, id, noms) où noms suit l'ordre de languages
+        """
+        self.languages = list(languages)
+        self._positions = {language: position for position, language in enumerate(self.languages)}
+        self._species = [(slug, species_id, tuple(names)) for slug, species_id, names in species]
+        self._names_by_slug = {slug: names for slug, _, names in self._species}
+        for slug, species_id, names in self._species:
+            self._names_by_slug[str(species_id)] = names
+        self._slugs = {str(species_id): slug for slug, species_id, _ in self._species}
+        self._reverse = {language: {} for language in self.languages}
+        self._reverse_any = {}
+        for slug, _, names in self._species:
+            for language, name in zip(self.languages, names):
+                if name:
+                    key = normalize_name(name)
+                    self._reverse[language][key] = slug
+                    self._reverse_any.setdefault(key, slug)
+
+    @classmethod
+    def build(cls, workers=BUILD_WORKERS):
+        """
+        Construit l'index à partir de toutes les ressources /pokemon-species.
+        """
+        entries = list_resources("pokemon-species")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            species_data = list(executor.map(lambda entry: get_resource("pokemon-species", entry["name"]), entries))
+
+        languages = []
+        for data in species_data:
+            for entry in data["names"]:
+                if entry["language"]["name"] not in languages:
+                    languages.append(entry["language"]["name"])
+        species = []
+        for data in sorted(species_data, key=lambda d: d["id"]):
+            names = {entry["language"]["name"]: entry["name"] for entry in data["names"]}
+            species.append((data["name"], data["id"], [names.get(language) for language in languages]))
+        return cls(languages, species)
+
+    @classmethod
+    def load(cls, path=NAME_INDEX_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["languages"], data["species"])
+
+    def save(self, path=NAME_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"languages": self.languages, "species": self._species}
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+
+    def translate(self, pokemon_name, language="fr"):
+        """
+        Retourne le nom d'une espèce dans une langue.
+        Args:
+            pokemon_name: Slug ou id de l'espèce (ex: "pikachu", 25)
+            language: Code de la langue cible
+        Returns:
+            Nom traduit, ou None si inconnu
+        """
+        names = self._names_by_slug.get(normalize_key(pokemon_name))
+        position = self._positions.get(language)
+        if names is None or position is None:
+            return None
+        return names[position]
+
+    def names_of(self, pokemon_name):
+        """
+        Retourne tous les noms d'une espèce.
+        Returns:
+            Dictionnaire langue -> nom (vide si l'espèce est inconnue)
+        """
+        names = self._names_by_slug.get(normalize_key(pokemon_name), ())
+        return {language: name for language, name in zip(self.languages, names) if name}
+
+    def slug_for(self, name, language=None):
+        """
+        Retrouve le slug d'une espèce à partir d'un nom localisé.
+        Args:
+            name: Nom dans n'importe quelle langue (ex: "Dracaufeu", "Glurak")
+            language: Code de langue pour restreindre la recherche (None pour toutes)
+        Returns:
+            Slug de l'espèce, ou None si inconnu
+        """
+        key = normalize_name(name)
+        if language is not None:
+            return self._reverse.get(language, {}).get(key)
+        slug = self._reverse_any.get(key)
+        if slug is None:
+            # Le nom donné est peut-être déjà un slug ou un id
+            slug_key = normalize_key(name)
+            if slug_key in self._names_by_slug:
+                slug = self._slugs.get(slug_key, slug_key)
+        return slug
+
+    def slugs(self):
+        return [slug for slug, _, _ in self._species]
+
+    def __contains__(self, pokemon_name):
+        return normalize_key(pokemon_name) in self._names_by_slug
+
+    def __len__(self):
+        return len(self._species)
+
+
+_name_index = None
+_name_index_lock = threading.Lock()
+
+
+def get_name_index(build=True, path=NAME_INDEX_PATH):
+    """
+    Retourne l'index des noms, chargé depuis le disque au premier appel.
+    Args:
+        build: Construire (et enregistrer) l'index s'il n'existe pas encore sur le disque
+        path: Fichier de l'index
+    Returns:
+        Le NameIndex, ou None s'il n'existe pas et que build est False
+    """
+    global _name_index
+    if _name_index is None:
+        with _name_index_lock:
+            if _name_index is None:
+                if os.path.exists(path):
+                    _name_index = NameIndex.load(path)
+                elif build:
+                    _name_index = NameIndex.build()
+                    _name_index.save(path)
+    return _name_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index des noms de Pokémon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit l'index à partir de PokéAPI")
+    build_parser.add_argument("path", nargs="?", default=NAME_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = NameIndex.build()
+        index.save(args.path)
+        print(f"{len(index)} espèces en {len(index.languages)} langues écrites dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
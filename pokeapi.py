@@ -0,0 +1,241 @@
+import json
+import os
+import time
+
+import metrics
+from http_cache import HttpCache
+from http_client import get_client
+from record_store import RecordStore
+from single_flight import SingleFlight
+
+CACHE_DIR = os.environ.get("POKESSENTIAL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pokessential"))
+
+RECORD_CACHE_SIZE = 256
+RECORD_TTL = 3600  # secondes
+
+# Un cache par endpoint ("pokemon", "pokemon-species", ...) créé à la demande
+_record_stores = {}
+
+# Cache HTTP persistant, désactivé par défaut (voir enable_http_cache)
+_http_cache = None
+
+# Snapshot local de PokéAPI (voir use_snapshot)
+_snapshot = None
+_offline = False
+
+# Une seule requête en cours par URL (voir fetch_json)
+_fetch_flights = SingleFlight("http_in_flight")
+
+
+def normalize_key(name):
+    """
+    Normalise un nom ou un id de ressource PokéAPI.
+    Args:
+        name: Nom ou id (ex: "Pikachu", " mr mime ", 25, "025")
+    Returns:
+        Clé normalisée (ex: "pikachu", "mr-mime", "25")
+    """
+    key = str(name).strip().lower().replace(" ", "-").replace("_", "-")
+    if key.isdigit():
+        key = str(int(key))
+    return key
+
+
+def resource_id(url):
+    """
+    Extrait l'id numérique d'une URL PokéAPI (ex: ".../pokemon/25/" -> 25).
+    """
+    return int(url.rstrip("/").rsplit("/", 1)[1])
+
+
+def _parse_json(body):
+    start = time.perf_counter()
+    data = json.loads(body)
+    metrics.record_parse(time.perf_counter() - start)
+    return data
+
+
+def fetch_json(url):
+    """
+    Télécharge et décode une réponse JSON de PokéAPI.
+    Les demandes simultanées d'une même URL (threads de préchargement, pool de la fenêtre, ...)
+    ne font qu'une requête : les autres appelants attendent son résultat ou son erreur.
+    Args:
+        url: URL complète de la ressource, ou chemin relatif (ex: "pokemon/25")
+    Returns:
+        Données JSON décodées (partagées entre les appelants simultanés : ne pas les modifier)
+    """
+    client = get_client()
+    if "://" not in url:
+        url = client.url_for(url)
+    return _fetch_flights.do(url, _fetch_json, client, url)
+
+
+def _fetch_json(client, url):
+    cache = _http_cache
+    if cache is None:
+        return client.get_json(url)
+
+    entry = cache.lookup(url)
+    if entry is not None and cache.is_fresh(entry):
+        metrics.record_cache("http", True)
+        return _parse_json(entry.body)
+
+    headers = cache.validators(entry) if entry is not None else {}
+    response = client.get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        # Revalidation : la requête est comptée, le corps vient du cache
+        metrics.record_cache("http", True)
+        cache.refresh(url)
+        return _parse_json(entry.body)
+    metrics.record_cache("http", False)
+    response.raise_for_status()
+    cache.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return _parse_json(response.content)
+
+
+def enable_http_cache(path=None, **options):
+    """
+    Active le cache HTTP persistant sous toutes les requêtes JSON.
+    Args:
+        path: Fichier SQLite (par défaut CACHE_DIR/http_cache.sqlite)
+        options: Options passées à HttpCache (max_bytes, max_age)
+    Returns:
+        Le cache activé
+    """
+    global _http_cache
+    if path is None:
+        path = os.path.join(CACHE_DIR, "http_cache.sqlite")
+    disable_http_cache()
+    _http_cache = HttpCache(path, **options)
+    return _http_cache
+
+
+def disable_http_cache():
+    """
+    Désactive le cache HTTP persistant.
+    """
+    global _http_cache
+    if _http_cache is not None:
+        _http_cache.close()
+        _http_cache = None
+
+
+def use_snapshot(path=None, offline=True):
+    """
+    Sert les ressources depuis un snapshot local (voir snapshot.py mirror).
+    Args:
+        path: Fichier du snapshot (par défaut CACHE_DIR/snapshot.sqlite)
+        offline: True pour ne jamais utiliser le réseau, False pour compléter
+            les ressources absentes depuis PokéAPI
+    Returns:
+        Le snapshot utilisé
+    """
+    global _snapshot, _offline
+    from snapshot import Snapshot
+
+    if path is None:
+        path = os.path.join(CACHE_DIR, "snapshot.sqlite")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Snapshot introuvable : {path}")
+    close_snapshot()
+    _snapshot = Snapshot(path)
+    _offline = offline
+    clear_record_cache()
+    return _snapshot
+
+
+def close_snapshot():
+    """
+    Revient aux requêtes PokéAPI classiques.
+    """
+    global _snapshot, _offline
+    if _snapshot is not None:
+        _snapshot.close()
+        _snapshot = None
+    _offline = False
+
+
+def has_snapshot():
+    """
+    Indique si les ressources sont servies depuis un snapshot local.
+    """
+    return _snapshot is not None
+
+
+def get_record_store(endpoint):
+    """
+    Retourne le cache mémoire associé à un endpoint.
+    """
+    store = _record_stores.get(endpoint)
+    if store is None:
+        store = _record_stores.setdefault(
+            endpoint, RecordStore(max_size=RECORD_CACHE_SIZE, ttl=RECORD_TTL)
+        )
+    return store
+
+
+def get_resource(endpoint, name):
+    """
+    Retourne une ressource PokéAPI en passant par le cache mémoire.
+    Le nom et l'id d'une même ressource pointent vers la même entrée.
+    Args:
+        endpoint: Endpoint de l'API (ex: "pokemon", "ability")
+        name: Nom ou id de la ressource
+    Returns:
+        Données JSON de la ressource
+    """
+    key = normalize_key(name)
+    store = get_record_store(endpoint)
+    data = store.get(key)
+    metrics.record_cache("record", data is not None)
+    if data is None:
+        if _snapshot is not None:
+            data = _snapshot.get(endpoint, key)
+            metrics.record_cache("snapshot", data is not None)
+        if data is None:
+            if _offline:
+                raise LookupError(f"{endpoint}/{key} absent du snapshot")
+            data = fetch_json(f"{endpoint}/{key}")
+        store.put(data["name"], data, aliases=(str(data["id"]), key))
+    return data
+
+
+def list_resources(endpoint):
+    """
+    Retourne la liste de toutes les ressources d'un endpoint.
+    Args:
+        endpoint: Endpoint de l'API (ex: "pokemon")
+    Returns:
+        Liste de dictionnaires {"name", "url"}
+    """
+    if _snapshot is not None:
+        results = _snapshot.list(endpoint)
+        if results or _offline:
+            return results
+    return fetch_json(f"{endpoint}?limit=100000")["results"]
+
+
+def get_pokemon_record(pokemon_name):
+    """
+    Retourne les données complètes d'un Pokémon (/pokemon/{name}).
+    Args:
+        pokemon_name: Nom ou id du Pokémon
+    Returns:
+        Données JSON du Pokémon
+    """
+    return get_resource("pokemon", pokemon_name)
+
+
+def clear_record_cache():
+    """
+    Vide les caches mémoire de tous les endpoints.
+    """
+    for store in _record_stores.values():
+        store.clear()
+
+
+if os.environ.get("POKESSENTIAL_HTTP_CACHE"):
+    enable_http_cache(os.environ["POKESSENTIAL_HTTP_CACHE"])
+if os.environ.get("POKESSENTIAL_SNAPSHOT"):
+    use_snapshot(os.environ["POKESSENTIAL_SNAPSHOT"])
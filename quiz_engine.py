@@ -0,0 +1,253 @@
+import functools
+import itertools
+import threading
+from collections import OrderedDict, namedtuple
+
+from answer_matcher import is_ability_answer, is_pokemon_answer
+from metrics import instrumented
+from name_index import get_name_index
+from quiz_rounds import ROUND_BUILDERS, build_sprite_round
+from type_index import get_type_index
+
+QUIZ_KINDS = ("types", "sprite", "ability")
+MAX_PENDING = 10000  # questions en attente de réponse gardées au plus (les plus anciennes sont oubliées)
+
+# Statuts d'une réponse : seuls "correct" et "wrong" clôturent la question et comptent dans le score
+CORRECT = "correct"
+WRONG = "wrong"
+EMPTY = "empty"
+UNKNOWN_POKEMON = "unknown_pokemon"
+UNKNOWN_QUESTION = "unknown_question"
+
+Question = namedtuple("Question", ["id", "kind", "prompt", "round"])
+Verdict = namedtuple("Verdict", ["status", "correct", "expected", "message", "question_id"])
+
+
+def round_builders(load_images=False):
+    """
+    Retourne les fonctions de préparation des manches, par type de quiz.
+    Args:
+        load_images: Décoder le sprite des manches « quel est ce Pokémon » (interface graphique) ;
+            sinon seule son URL est fournie
+    """
+    builders = dict(ROUND_BUILDERS)
+    if not load_images:
+        builders["sprite"] = functools.partial(build_sprite_round, load_image=False)
+    return builders
+
+
+def round_prompt(kind, quiz_round):
+    """
+    Retourne le texte de la question d'une manche.
+    """
+    if kind == "types":
+        return "Donne un Pokemon avec les types :\n" + " / ".join(quiz_round.types)
+    if kind == "sprite":
+        return "Quel est ce Pokemon ?"
+    if kind == "ability":
+        return f"Description du talent :\n{quiz_round.description}\n\nQuel est le nom du talent ?"
+    raise ValueError(f"Type de quiz inconnu : {kind}")
+
+
+def expected_answer(kind, quiz_round):
+    """
+    Retourne la réponse attendue d'une manche, telle qu'affichée au joueur.
+    """
+    if kind == "types":
+        return " / ".join(quiz_round.types)
+    if kind == "sprite":
+        return quiz_round.answer_name
+    if kind == "ability":
+        return quiz_round.translated_name or quiz_round.ability_name
+    raise ValueError(f"Type de quiz inconnu : {kind}")
+
+
+def _pokemon_has_types(guess, types):
+    # Slug ou id d'abord, puis nom localisé (ex: "Dracaufeu") via l'index des noms
+    type_index = get_type_index()
+    is_valid = type_index.has_types(guess, types)
+    if is_valid is None:
+        name_index = get_name_index(build=False)
+        slug = name_index.slug_for(guess) if name_index is not None else None
+        if slug is not None:
+            is_valid = type_index.has_types(slug, types)
+    return is_valid
+
+
+def grade(question, guess):
+    """
+    Corrige une réponse, sans modifier aucun état.
+    Args:
+        question: Question posée
+        guess: Réponse saisie
+    Returns:
+        Verdict
+    """
+    kind = question.kind
+    quiz_round = question.round
+    guess = (guess or "").strip()
+    if not guess:
+        message = "Entre un nom de talent." if kind == "ability" else "Entre un nom de Pokemon."
+        return Verdict(EMPTY, False, None, message, question.id)
+
+    if kind == "types":
+        try:
+            is_valid = _pokemon_has_types(guess, quiz_round.types)
+        except Exception:
+            is_valid = None
+        if is_valid is None:
+            return Verdict(UNKNOWN_POKEMON, False, None, "Pokemon introuvable.", question.id)
+        correct = is_valid
+        failure_message = "Types attendus : {}"
+    elif kind == "sprite":
+        correct = is_pokemon_answer(guess, quiz_round.species_name, quiz_round.accepted_names)
+        failure_message = "C'etait : {}"
+    elif kind == "ability":
+        correct = is_ability_answer(guess, quiz_round.ability_name, quiz_round.accepted_names)
+        failure_message = "Reponse : {}"
+    else:
+        raise ValueError(f"Type de quiz inconnu : {kind}")
+
+    expected = expected_answer(kind, quiz_round)
+    message = "Bonne reponse !" if correct else failure_message.format(expected)
+    return Verdict(CORRECT if correct else WRONG, correct, expected, message, question.id)
+
+
+class QuizScore:
+    """
+    Score d'une session : réponses, bonnes réponses, série en cours et meilleure série.
+    """
+
+    def __init__(self):
+        self.answered = 0
+        self.correct = 0
+        self.streak = 0
+        self.best_streak = 0
+        self.by_kind = {}  # type de quiz -> [réponses, bonnes réponses]
+
+    def add(self, kind, correct):
+        self.answered += 1
+        counts = self.by_kind.setdefault(kind, [0, 0])
+        counts[0] += 1
+        if correct:
+            self.correct += 1
+            counts[1] += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+
+    def as_dict(self):
+        return {
+            "answered": self.answered,
+            "correct": self.correct,
+            "streak": self.streak,
+            "best_streak": self.best_streak,
+            "by_kind": {kind: {"answered": counts[0], "correct": counts[1]} for kind, counts in self.by_kind.items()},
+        }
+
+
+class QuizEngine:
+    """
+    Moteur de quiz sans interface : prépare les manches, corrige les réponses et tient le score.
+
+    Les questions et verdicts sont de simples données : la fenêtre Tk, la console,
+    un bot ou un serveur web se contentent de les afficher. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, builders=None, prefetcher=None, max_pending=MAX_PENDING, load_images=False):
+        """
+        Args:
+            builders: Dictionnaire type de quiz -> fonction préparant une manche (par défaut round_builders())
+            prefetcher: RoundPrefetcher où prendre les manches déjà prêtes (None : préparation à la demande)
+            max_pending: Nombre maximal de questions en attente de réponse
+            load_images: Décoder le sprite des manches « quel est ce Pokémon » (interface graphique)
+        """
+        self.builders = builders if builders is not None else round_builders(load_images)
+        self.prefetcher = prefetcher
+        self.max_pending = max_pending
+        self.score = QuizScore()
+        self._pending = OrderedDict()  # id -> Question
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def kinds(self):
+        return tuple(self.builders)
+
+    def _build(self, kind, block):
+        if kind not in self.builders:
+            raise ValueError(f"Type de quiz inconnu : {kind}")
+        if self.prefetcher is not None:
+            quiz_round = self.prefetcher.take(kind)
+            if quiz_round is not None or not block:
+                return quiz_round
+        return self.builders[kind]()
+
+    @instrumented
+    def new_round(self, kind, block=True):
+        """
+        Pose une nouvelle question.
+        Args:
+            kind: Type de quiz ("types", "sprite", "ability")
+            block: False pour ne prendre qu'une manche déjà prête dans le prefetcher
+        Returns:
+            Question, ou None si block est False et qu'aucune manche n'est prête
+        Raises:
+            RoundUnavailable: La manche n'a pas pu être préparée
+        """
+        quiz_round = self._build(kind, block)
+        if quiz_round is None:
+            return None
+        with self._lock:
+            question = Question(next(self._ids), kind, round_prompt(kind, quiz_round), quiz_round)
+            self._pending[question.id] = question
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+        return question
+
+    def get_question(self, question_id):
+        """
+        Retourne une question en attente de réponse, ou None.
+        """
+        with self._lock:
+            return self._pending.get(question_id)
+
+    @instrumented
+    def answer(self, question_id, guess):
+        """
+        Corrige la réponse à une question en attente et met le score à jour.
+        Une réponse vide ou un Pokémon inconnu laisse la question en attente.
+        Returns:
+            Verdict
+        """
+        question = self.get_question(question_id)
+        if question is None:
+            return Verdict(UNKNOWN_QUESTION, False, None, "Question inconnue ou deja repondue.", question_id)
+        verdict = grade(question, guess)
+        if verdict.status not in (CORRECT, WRONG):
+            return verdict
+        with self._lock:
+            if self._pending.pop(question_id, None) is None:
+                # Un autre thread a répondu entre-temps
+                return Verdict(UNKNOWN_QUESTION, False, None, "Question inconnue ou deja repondue.", question_id)
+            self.score.add(question.kind, verdict.correct)
+        return verdict
+
+    def discard(self, question_id):
+        """
+        Abandonne une question sans réponse (sans effet sur le score).
+        """
+        with self._lock:
+            self._pending.pop(question_id, None)
+
+    def score_snapshot(self):
+        """
+        Retourne une copie du score (dictionnaire), cohérente même si d'autres threads répondent.
+        """
+        with self._lock:
+            return self.score.as_dict()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
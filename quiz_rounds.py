@@ -0,0 +1,248 @@
+import queue
+import random
+import threading
+from collections import namedtuple
+
+from ability_store import get_ability_store
+from http_client import network_errors
+from metrics import instrumented
+from pokeapi import get_pokemon_record
+from roster import get_roster
+from simple_functions import get_poke_sprite, get_pokemon_name_list
+from sprite_atlas import get_sprite_atlas
+from sprite_cache import get_sprite_cache
+from type_index import get_type_index
+
+SPRITE_SCALE = 7
+DEFAULT_BUFFER_SIZE = 3
+RETRY_DELAY = 2  # secondes d'attente après un échec de préparation
+
+TypeRound = namedtuple("TypeRound", ["types"])
+SpriteRound = namedtuple("SpriteRound", ["answer_name", "species_name", "accepted_names", "sprite_url", "image"])
+AbilityRound = namedtuple("AbilityRound", ["ability_name", "translated_name", "description", "accepted_names"])
+
+
+class RoundUnavailable(Exception):
+    """
+    Une manche de quiz n'a pas pu être préparée (le message est affiché tel quel).
+    """
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def _next_entry():
+    """
+    Tire une entrée du roster, sans répétition pendant la session.
+    """
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = get_roster().sampler()
+    return _sampler.next()
+
+
+def get_random_pokemon():
+    """
+    Retourne les données d'un Pokémon tiré au hasard, sans répétition pendant la session,
+    ou None si elles n'ont pas pu être récupérées.
+    """
+    try:
+        return get_pokemon_record(_next_entry().id)
+    except (*network_errors(), LookupError):
+        return None
+
+
+def _load_random_pokemon():
+    data = get_random_pokemon()
+    if not data:
+        raise RoundUnavailable("Impossible de recuperer un Pokemon.")
+    return data
+
+
+@instrumented
+def load_sprite_image(pokemon_name, scale=SPRITE_SCALE, **sprite_options):
+    """
+    Télécharge et agrandit le sprite d'un Pokémon (sans appel à Tk, utilisable depuis un thread).
+    Args:
+        pokemon_name: Nom du Pokémon
+        scale: Facteur d'agrandissement
+        sprite_options: Options de get_poke_sprite (generation, shiny, ...)
+    Returns:
+        Image PIL agrandie
+    """
+    if not sprite_options:
+        # Sprite par défaut : découpé dans l'atlas s'il a été construit
+        atlas = get_sprite_atlas()
+        image = atlas.image(pokemon_name, scale) if atlas is not None else None
+        if image is not None:
+            return image
+    sprite_url = get_poke_sprite(pokemon_name, **sprite_options)
+    return get_sprite_cache().get_image(sprite_url, scale)
+
+
+@instrumented
+def build_type_round():
+    """
+    Prépare une manche « donne un Pokémon de ces types ».
+    Les types viennent de l'index des types : aucune requête une fois l'index construit.
+    """
+    try:
+        types = get_type_index().types_of(_next_entry().id)
+    except (*network_errors(), LookupError):
+        raise RoundUnavailable("Impossible de recuperer un Pokemon.")
+    if not types:
+        # Pokémon absent de l'index (roster plus récent) : types lus dans ses données
+        data = _load_random_pokemon()
+        types = [entry["type"]["name"] for entry in data.get("types", [])]
+    if not types:
+        raise RoundUnavailable("Types indisponibles.")
+    return TypeRound(list(types))
+
+
+@instrumented
+def build_sprite_round(load_image=True):
+    """
+    Prépare une manche « quel est ce Pokémon ».
+    Args:
+        load_image: True pour décoder et agrandir le sprite (interface graphique),
+            False pour ne fournir que son URL (bot, serveur web)
+    """
+    try:
+        entry = _next_entry()
+        answer_name = entry.slug
+        species_name = entry.species or get_pokemon_record(entry.id)["species"]["name"]
+        sprite_url = get_poke_sprite(answer_name)
+    except (*network_errors(), LookupError, KeyError):
+        raise RoundUnavailable("Impossible de recuperer un Pokemon.")
+    if not sprite_url:
+        raise RoundUnavailable("Sprite indisponible.")
+
+    image = None
+    if load_image:
+        try:
+            image = load_sprite_image(answer_name)
+        except Exception:
+            raise RoundUnavailable("Impossible d'afficher le sprite.")
+
+    try:
+        accepted_names = [answer_name, *get_pokemon_name_list(species_name).values()]
+    except Exception:
+        accepted_names = [answer_name]
+    return SpriteRound(answer_name, species_name, accepted_names, sprite_url, image)
+
+
+_ability_records = None
+
+
+def _random_ability_record():
+    global _ability_records
+    store = get_ability_store()
+    if store.complete:
+        # Store complet : tirage direct parmi tous les talents, sans passer par un Pokémon
+        if _ability_records is None:
+            _ability_records = store.records()
+        return random.choice(_ability_records)
+
+    data = _load_random_pokemon()
+    abilities = [entry["ability"]["name"] for entry in data.get("abilities", [])]
+    if not abilities:
+        raise RoundUnavailable("Talents indisponibles.")
+    try:
+        return store.get(random.choice(abilities))
+    except Exception:
+        raise RoundUnavailable("Description indisponible.")
+
+
+@instrumented
+def build_ability_round():
+    """
+    Prépare une manche « quel est ce talent », description en français ou à défaut en anglais.
+    """
+    record = _random_ability_record()
+    translated_name, description = record.describe(("fr", "en"))
+    if not description:
+        raise RoundUnavailable("Description indisponible.")
+    return AbilityRound(record.name, translated_name, description, list(record.names.values()))
+
+
+ROUND_BUILDERS = {
+    "types": build_type_round,
+    "sprite": build_sprite_round,
+    "ability": build_ability_round,
+}
+
+
+class RoundPrefetcher:
+    """
+    Prépare les manches à l'avance, en arrière-plan.
+
+    Un thread par type de quiz garde une file de buffer_size manches
+    prêtes et la complète à mesure qu'elles sont consommées.
+    """
+
+    def __init__(self, builders=ROUND_BUILDERS, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Args:
+            builders: Dictionnaire type de quiz -> fonction préparant une manche
+            buffer_size: Nombre de manches gardées prêtes par type de quiz
+        """
+        self.builders = dict(builders)
+        self._queues = {kind: queue.Queue(maxsize=buffer_size) for kind in self.builders}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """
+        Démarre les threads de préparation (sans effet s'ils tournent déjà).
+        """
+        if self._threads:
+            return
+        self._stop = threading.Event()
+        for kind in self.builders:
+            thread = threading.Thread(
+                target=self._fill, args=(kind, self._stop), name=f"prefetch-{kind}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._threads = []
+
+    def take(self, kind, timeout=None):
+        """
+        Retire une manche prête.
+        Args:
+            kind: Type de quiz ("types", "sprite", "ability")
+            timeout: Attente maximale en secondes (None : ne pas attendre)
+        Returns:
+            La manche, ou None si aucune n'est prête
+        """
+        try:
+            if timeout is None:
+                return self._queues[kind].get_nowait()
+            return self._queues[kind].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ready_count(self, kind):
+        return self._queues[kind].qsize()
+
+    def _fill(self, kind, stop):
+        builder = self.builders[kind]
+        round_queue = self._queues[kind]
+        while not stop.is_set():
+            try:
+                quiz_round = builder()
+            except Exception:
+                stop.wait(RETRY_DELAY)
+                continue
+            while not stop.is_set():
+                try:
+                    round_queue.put(quiz_round, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
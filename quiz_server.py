@@ -0,0 +1,615 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import secrets
+import struct
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from http_client import DEFAULT_POOL_SIZE
+from quiz_engine import QUIZ_KINDS, QuizEngine, round_builders
+from quiz_rounds import SPRITE_SCALE, RoundPrefetcher, RoundUnavailable, load_sprite_image
+from single_flight import AsyncSingleFlight
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_SESSIONS = 10000
+SESSION_TTL = 30 * 60  # secondes d'inactivité avant l'oubli d'une session
+SWEEP_INTERVAL = 60
+MAX_PENDING_PER_SESSION = 32
+PREFETCH_BUFFER = 64  # manches prêtes par type de quiz, partagées par toutes les sessions
+KEEPALIVE_TIMEOUT = 30
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 64 * 1024
+MAX_SCALE = 10
+PNG_CACHE_BYTES = 64 * 1024 * 1024
+
+log = logging.getLogger("quiz_server")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_CONTINUATION, WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+REASONS = {
+    101: "Switching Protocols", 200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    """
+    Erreur renvoyée telle quelle au client (statut HTTP et message).
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def http_error(error):
+    """
+    Convertit une exception en HttpError renvoyable au client :
+    RoundUnavailable -> 503, toute autre erreur inattendue -> 500 (journalisée).
+    """
+    if isinstance(error, HttpError):
+        return error
+    if isinstance(error, RoundUnavailable):
+        return HttpError(503, str(error))
+    log.error("Erreur inattendue", exc_info=error)
+    return HttpError(500, "Erreur interne.")
+
+
+class QuizSession:
+    """
+    Une session de joueur : ses questions en attente et son score.
+    Les données, index et sprites sont partagés par toutes les sessions.
+    """
+
+    def __init__(self, session_id, engine):
+        self.id = session_id
+        self.engine = engine
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+
+def render_sprite_png(pokemon_name, scale=SPRITE_SCALE):
+    """
+    Retourne le sprite d'un Pokémon agrandi, encodé en PNG (bloquant : à appeler depuis un thread).
+    """
+    image = load_sprite_image(pokemon_name, scale)
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def question_payload(question, session_id=None):
+    """
+    Convertit une question en dictionnaire JSON (sans la réponse).
+    """
+    data = {"id": question.id, "kind": question.kind, "prompt": question.prompt}
+    if question.kind == "sprite" and session_id is not None:
+        data["sprite"] = f"/api/sessions/{session_id}/questions/{question.id}/sprite.png"
+    return data
+
+
+def verdict_payload(verdict, score):
+    data = verdict._asdict()
+    data["score"] = score
+    return data
+
+
+class QuizServer:
+    """
+    Serveur de quiz asyncio (HTTP/1.1 et WebSocket, bibliothèque standard uniquement).
+
+    Toutes les sessions partagent un prefetcher de manches et les caches du processus
+    (records, index, sprites) ; les PNG agrandis sont gardés en mémoire et les demandes
+    simultanées du même sprite n'en produisent qu'un. Le travail bloquant (préparation
+    des manches, correction, encodage PNG) tourne dans un pool de threads.
+
+    HTTP :
+        POST   /api/sessions                                      -> {"session": id}
+        GET    /api/sessions/{id}                                 -> score
+        DELETE /api/sessions/{id}
+        POST   /api/sessions/{id}/questions   {"kind": ...}       -> question
+        GET    /api/sessions/{id}/questions/{question}/sprite.png?scale=N
+        POST   /api/sessions/{id}/answers     {"question": ..., "guess": ...} -> verdict et score
+        GET    /metrics, GET /healthz
+    WebSocket (/ws, ou /ws?session=id pour reprendre une session), messages JSON :
+        {"op": "round", "kind": ..., "scale": N} -> {"op": "question", ...} puis, pour un sprite, le PNG en binaire
+        {"op": "answer", "id": ..., "guess": ...} -> {"op": "verdict", ...}
+        {"op": "score"} -> {"op": "score", "score": ...}
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_sessions=MAX_SESSIONS,
+                 session_ttl=SESSION_TTL, workers=DEFAULT_POOL_SIZE, prefetch=True):
+        """
+        Args:
+            host: Adresse d'écoute
+            port: Port d'écoute (0 : choisi par le système)
+            max_sessions: Nombre maximal de sessions simultanées
+            session_ttl: Secondes d'inactivité avant l'oubli d'une session
+            workers: Taille du pool de threads du travail bloquant
+            prefetch: Préparer les manches à l'avance en arrière-plan
+        """
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.builders = round_builders(load_images=False)
+        self.prefetcher = RoundPrefetcher(self.builders, buffer_size=PREFETCH_BUFFER) if prefetch else None
+        self.sessions = {}
+        self.connections = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-server")
+        self._png_cache = OrderedDict()  # (nom, échelle) -> PNG, utilisé depuis la boucle uniquement
+        self._png_bytes = 0
+        self._png_flights = AsyncSingleFlight("sprite_png_in_flight")
+        self._server = None
+        self._sweeper = None
+        self._connection_writers = {}  # tâche de la connexion -> writer
+
+    # --- sessions -----------------------------------------------------------------
+
+    def create_session(self):
+        if len(self.sessions) >= self.max_sessions:
+            self.sweep()
+            if len(self.sessions) >= self.max_sessions:
+                raise HttpError(503, "Trop de sessions.")
+        session_id = secrets.token_urlsafe(12)
+        engine = QuizEngine(self.builders, self.prefetcher, max_pending=MAX_PENDING_PER_SESSION)
+        session = self.sessions[session_id] = QuizSession(session_id, engine)
+        return session
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "Session inconnue.")
+        session.touch()
+        return session
+
+    def sweep(self):
+        """
+        Oublie les sessions inactives depuis plus de session_ttl secondes.
+        """
+        limit = time.monotonic() - self.session_ttl
+        for session_id in [sid for sid, session in self.sessions.items() if session.last_seen < limit]:
+            del self.sessions[session_id]
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.sweep()
+
+    # --- quiz ---------------------------------------------------------------------
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def new_question(self, session, kind):
+        if kind not in QUIZ_KINDS:
+            raise HttpError(400, f"Type de quiz inconnu : {kind}")
+        # Manche déjà prête : pas de passage par le pool de threads
+        question = session.engine.new_round(kind, block=False) if self.prefetcher is not None else None
+        if question is None:
+            question = await self._run(session.engine.new_round, kind)
+        return question
+
+    async def answer(self, session, question_id, guess):
+        if not isinstance(question_id, int) or not isinstance(guess, (str, type(None))):
+            raise HttpError(400, "Champs attendus : question (entier) et guess (texte).")
+        verdict = await self._run(session.engine.answer, question_id, guess)
+        return verdict_payload(verdict, session.engine.score_snapshot())
+
+    async def sprite_png(self, pokemon_name, scale=SPRITE_SCALE):
+        """
+        Retourne le PNG agrandi d'un sprite, partagé entre toutes les sessions.
+        """
+        key = (pokemon_name, scale)
+        png = self._png_cache.get(key)
+        metrics.record_cache("sprite_png", png is not None)
+        if png is not None:
+            self._png_cache.move_to_end(key)
+            return png
+        png = await self._png_flights.run(key, render_sprite_png, pokemon_name, scale, executor=self._executor)
+        if key in self._png_cache:
+            # Déjà rangé par un appelant qui attendait le même rendu
+            return png
+        self._png_cache[key] = png
+        self._png_bytes += len(png)
+        while self._png_bytes > PNG_CACHE_BYTES and len(self._png_cache) > 1:
+            _, oldest = self._png_cache.popitem(last=False)
+            self._png_bytes -= len(oldest)
+        return png
+
+    async def question_sprite(self, session, question_id, scale):
+        question = session.engine.get_question(question_id)
+        if question is None or question.kind != "sprite":
+            raise HttpError(404, "Question inconnue ou deja repondue.")
+        try:
+            return await self.sprite_png(question.round.answer_name, scale)
+        except Exception:
+            raise HttpError(503, "Impossible d'afficher le sprite.")
+
+    # --- HTTP ---------------------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._connection_writers[task] = writer
+        try:
+            await self._serve_connection(reader, writer)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Arrêt du serveur : fermeture silencieuse
+            raise
+        except Exception:
+            log.exception("Connexion interrompue par une erreur inattendue")
+        finally:
+            self._connection_writers.pop(task, None)
+            self.connections -= 1
+            writer.close()
+
+    async def _serve_connection(self, reader, writer):
+        while True:
+            try:
+                request = await asyncio.wait_for(_read_request(reader), KEEPALIVE_TIMEOUT)
+            except HttpError as error:
+                await _send_json(writer, error.status, {"error": error.message}, keep_alive=False)
+                return
+            if request is None:
+                return
+            method, path, query, headers, body = request
+            if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._handle_websocket(reader, writer, query, headers)
+                return
+            keep_alive = headers.get("connection", "").lower() != "close"
+            try:
+                status, content_type, payload = await self._route(method, path, query, body)
+            except Exception as error:
+                error = http_error(error)
+                status, content_type, payload = error.status, "application/json", {"error": error.message}
+            if content_type == "application/json":
+                await _send_json(writer, status, payload, keep_alive)
+            else:
+                await _send(writer, status, payload, content_type, keep_alive)
+            if not keep_alive:
+                return
+
+    async def _route(self, method, path, query, body):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["healthz"]:
+            return 200, "application/json", {"status": "ok", "sessions": len(self.sessions)}
+        if parts == ["metrics"]:
+            return 200, "text/plain; version=0.0.4", self.prometheus().encode("utf-8")
+        if parts[:2] != ["api", "sessions"]:
+            raise HttpError(404, "Introuvable.")
+        parts = parts[2:]
+
+        if not parts:
+            _require(method, "POST")
+            return 201, "application/json", {"session": self.create_session().id}
+        session = self.get_session(parts[0])
+        if len(parts) == 1:
+            if method == "DELETE":
+                self.sessions.pop(session.id, None)
+                return 204, "application/json", None
+            _require(method, "GET")
+            return 200, "application/json", {"session": session.id, "score": session.engine.score_snapshot()}
+        if parts[1:] == ["questions"]:
+            _require(method, "POST")
+            kind = _json_body(body).get("kind")
+            question = await self.new_question(session, kind)
+            return 201, "application/json", question_payload(question, session.id)
+        if len(parts) == 4 and parts[1] == "questions" and parts[3] == "sprite.png":
+            _require(method, "GET")
+            png = await self.question_sprite(session, _int(parts[2]), _scale(query))
+            return 200, "image/png", png
+        if parts[1:] == ["answers"]:
+            _require(method, "POST")
+            data = _json_body(body)
+            return 200, "application/json", await self.answer(session, data.get("question"), data.get("guess"))
+        raise HttpError(404, "Introuvable.")
+
+    def prometheus(self):
+        lines = [
+            "# HELP pokessential_quiz_sessions Sessions de quiz actives",
+            "# TYPE pokessential_quiz_sessions gauge",
+            f"pokessential_quiz_sessions {len(self.sessions)}",
+            "# HELP pokessential_quiz_connections Connexions ouvertes",
+            "# TYPE pokessential_quiz_connections gauge",
+            f"pokessential_quiz_connections {self.connections}",
+        ]
+        return metrics.to_prometheus() + "\n".join(lines) + "\n"
+
+    # --- WebSocket ----------------------------------------------------------------
+
+    async def _handle_websocket(self, reader, writer, query, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await _send_json(writer, 400, {"error": "Sec-WebSocket-Key manquant."}, keep_alive=False)
+            return
+        try:
+            session_id = query.get("session", [None])[0]
+            session = self.get_session(session_id) if session_id else self.create_session()
+        except HttpError as error:
+            await _send_json(writer, error.status, {"error": error.message}, keep_alive=False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        await _ws_send_json(writer, {"op": "session", "session": session.id})
+
+        while True:
+            opcode, payload = await _ws_read_message(reader, writer)
+            if opcode == WS_CLOSE:
+                writer.write(_ws_frame(WS_CLOSE, payload[:2]))
+                await writer.drain()
+                return
+            if opcode != WS_TEXT:
+                continue
+            session.touch()
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await _ws_send_json(writer, {"op": "error", "status": 400, "message": "Message JSON invalide."})
+                continue
+            try:
+                await self._ws_dispatch(writer, session, message)
+            except Exception as error:
+                error = http_error(error)
+                await _ws_send_json(writer, {"op": "error", "status": error.status, "message": error.message})
+
+    async def _ws_dispatch(self, writer, session, message):
+        op = message.get("op")
+        if op == "round":
+            question = await self.new_question(session, message.get("kind"))
+            await _ws_send_json(writer, {"op": "question", **question_payload(question)})
+            if question.kind == "sprite":
+                scale = _scale({"scale": [message.get("scale", SPRITE_SCALE)]})
+                png = await self.question_sprite(session, question.id, scale)
+                writer.write(_ws_frame(WS_BINARY, png))
+                await writer.drain()
+        elif op == "answer":
+            verdict = await self.answer(session, message.get("id"), message.get("guess"))
+            await _ws_send_json(writer, {"op": "verdict", **verdict})
+        elif op == "score":
+            await _ws_send_json(writer, {"op": "score", "score": session.engine.score_snapshot()})
+        else:
+            raise HttpError(400, f"Operation inconnue : {op}")
+
+    # --- cycle de vie -------------------------------------------------------------
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE, backlog=1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+        if self.prefetcher is not None:
+            self.prefetcher.start()
+        return self
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._server is not None:
+            self._server.close()
+            # Connexions encore ouvertes (WebSocket, keep-alive) : le socket est fermé, la lecture en cours
+            # se termine sur une fin de flux et la tâche s'arrête normalement (sans annulation ni trace)
+            tasks = list(self._connection_writers)
+            for writer in self._connection_writers.values():
+                writer.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _require(method, expected):
+    if method != expected:
+        raise HttpError(405, f"Methode attendue : {expected}")
+
+
+def _int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Entier attendu : {text}")
+
+
+def _scale(query):
+    scale = _int(query.get("scale", [SPRITE_SCALE])[0])
+    if not 1 <= scale <= MAX_SCALE:
+        raise HttpError(400, f"scale doit etre entre 1 et {MAX_SCALE}.")
+    return scale
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "Corps JSON invalide.")
+    if not isinstance(data, dict):
+        raise HttpError(400, "Objet JSON attendu.")
+    return data
+
+
+async def _read_request(reader):
+    """
+    Lit une requête HTTP/1.1.
+    Returns:
+        Tuple (méthode, chemin, query, en-têtes en minuscules, corps), ou None si la connexion est fermée
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            return None
+        raise
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "En-tetes trop longs.")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Ligne de requete invalide.")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = _int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Corps trop long.")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), headers, body
+
+
+async def _send(writer, status, body, content_type, keep_alive=True):
+    body = body or b""
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("ascii") + body)
+    await writer.drain()
+
+
+async def _send_json(writer, status, data, keep_alive=True):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8") if data is not None else b""
+    await _send(writer, status, body, "application/json", keep_alive)
+
+
+def _ws_frame(opcode, payload):
+    # Trames du serveur : jamais masquées, jamais fragmentées
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _ws_send_json(writer, data):
+    writer.write(_ws_frame(WS_TEXT, json.dumps(data, ensure_ascii=False).encode("utf-8")))
+    await writer.drain()
+
+
+async def _ws_read_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY_SIZE:
+        raise ConnectionError("Message WebSocket trop long")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask and length:
+        # Démasquage en un seul XOR sur des entiers plutôt qu'octet par octet
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+async def _ws_read_message(reader, writer):
+    """
+    Lit un message WebSocket complet (trames de continuation réassemblées, pings répondus).
+    Returns:
+        Tuple (opcode, contenu)
+    """
+    message_opcode = None
+    parts = []
+    while True:
+        fin, opcode, payload = await _ws_read_frame(reader)
+        if opcode == WS_PING:
+            writer.write(_ws_frame(WS_PONG, payload))
+            await writer.drain()
+            continue
+        if opcode == WS_PONG:
+            continue
+        if opcode == WS_CLOSE:
+            return opcode, payload
+        if opcode != WS_CONTINUATION:
+            message_opcode = opcode
+            parts = []
+        parts.append(payload)
+        if sum(len(part) for part in parts) > MAX_BODY_SIZE:
+            raise ConnectionError("Message WebSocket trop long")
+        if fin:
+            return message_opcode, b"".join(parts)
+
+
+async def _serve(args):
+    server = QuizServer(args.host, args.port, max_sessions=args.max_sessions, workers=args.workers,
+                        prefetch=not args.no_prefetch)
+    await server.start()
+    print(f"Serveur de quiz sur {server.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de quiz Pokémon multi-joueurs (HTTP et WebSocket)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_POOL_SIZE, help="Threads du travail bloquant")
+    parser.add_argument("--no-prefetch", action="store_true", help="Ne pas préparer les manches à l'avance")
+    parser.add_argument("--fake-snapshot", help="Servir les données d'un snapshot via un faux PokéAPI local")
+    parser.add_argument("--fake-fixtures", help="Servir des fixtures via un faux PokéAPI local")
+    args = parser.parse_args(argv)
+
+    fake = None
+    if args.fake_snapshot or args.fake_fixtures:
+        from fake_pokeapi import FakePokeApi
+        from http_client import PokeClient, set_client
+
+        fake = FakePokeApi(args.fake_snapshot, args.fake_fixtures).start()
+        set_client(PokeClient(base_url=fake.api_url))
+        print(f"PokéAPI locale sur {fake.api_url}")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if fake is not None:
+            fake.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
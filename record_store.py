@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecordStore:
+    """
+    Cache mémoire LRU avec durée de vie (TTL) pour les réponses de PokéAPI.
+
+    Une entrée peut être retrouvée par plusieurs clés (nom et id par exemple) :
+    les alias pointent vers la clé canonique et disparaissent avec elle.
+    """
+
+    def __init__(self, max_size=256, ttl=3600, clock=time.monotonic):
+        """
+        Args:
+            max_size: Nombre maximum d'entrées conservées
+            ttl: Durée de vie d'une entrée en secondes (None pour illimitée)
+            clock: Fonction retournant l'heure courante en secondes
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # clé canonique -> (expiration, valeur, alias)
+        self._aliases = {}  # alias -> clé canonique
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Retourne la valeur associée à une clé ou à un alias, None si absente ou expirée.
+        """
+        with self._lock:
+            canonical = self._aliases.get(key, key)
+            entry = self._entries.get(canonical)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at <= self._clock():
+                self._remove(canonical)
+                return None
+            self._entries.move_to_end(canonical)
+            return value
+
+    def put(self, key, value, aliases=()):
+        """
+        Enregistre une valeur sous une clé canonique et d'éventuels alias.
+        Args:
+            key: Clé canonique (ex: nom du Pokémon)
+            value: Valeur à conserver
+            aliases: Autres clés menant à la même valeur (ex: id)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = self._clock() + self.ttl if self.ttl is not None else None
+            alias_set = frozenset(a for a in aliases if a != key)
+            self._entries[key] = (expires_at, value, alias_set)
+            for alias in alias_set:
+                previous = self._aliases.get(alias)
+                if previous is not None and previous != key:
+                    self._remove(previous)
+                self._aliases[alias] = key
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, canonical):
+        _, _, aliases = self._entries.pop(canonical)
+        for alias in aliases:
+            if self._aliases.get(alias) == canonical:
+                del self._aliases[alias]
@@ -0,0 +1,214 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pokeapi
+from pokeapi import CACHE_DIR, get_resource, list_resources, resource_id
+
+ROSTER_PATH = os.environ.get("POKESSENTIAL_ROSTER", os.path.join(CACHE_DIR, "roster.json.gz"))
+BUILD_WORKERS = 8
+# PokéAPI numérote les formes alternatives à partir de 10001
+FIRST_FORM_ID = 10001
+
+ROMAN_NUMERALS = {"i": 1, "v": 5, "x": 10}
+
+RosterEntry = namedtuple("RosterEntry", ["id", "slug", "species", "generation", "is_default"])
+
+
+def generation_number(generation_name):
+    """
+    Convertit un nom de génération PokéAPI en numéro (ex: "generation-iv" -> 4).
+    """
+    numeral = generation_name.rsplit("-", 1)[1]
+    total = 0
+    for i, letter in enumerate(numeral):
+        value = ROMAN_NUMERALS[letter]
+        if i + 1 < len(numeral) and ROMAN_NUMERALS[numeral[i + 1]] > value:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+class Roster:
+    """
+    Liste de tous les Pokémon (formes comprises) avec leur espèce et leur génération.
+
+    Les sous-listes filtrées sont calculées une fois : un tirage au sort est
+    un simple random.choice, sans réseau et toujours valide.
+    """
+
+    def __init__(self, entries, complete=True):
+        """
+        Args:
+            entries: Liste de RosterEntry
+            complete: False si l'espèce et la génération ne sont pas connues
+        """
+        self.entries = tuple(sorted((RosterEntry(*entry) for entry in entries), key=lambda e: e.id))
+        self.complete = complete
+        self._by_key = {}
+        for entry in self.entries:
+            self._by_key[entry.slug] = entry
+            self._by_key[str(entry.id)] = entry
+        self._filtered = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, workers=BUILD_WORKERS):
+        """
+        Construit le roster complet à partir de toutes les ressources /pokemon-species.
+        """
+        species_entries = list_resources("pokemon-species")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            species_data = executor.map(lambda entry: get_resource("pokemon-species", entry["name"]), species_entries)
+            entries = []
+            for data in species_data:
+                generation = generation_number(data["generation"]["name"])
+                for variety in data["varieties"]:
+                    entries.append(RosterEntry(
+                        resource_id(variety["pokemon"]["url"]),
+                        variety["pokemon"]["name"],
+                        data["name"],
+                        generation,
+                        variety["is_default"],
+                    ))
+        return cls(entries)
+
+    @classmethod
+    def build_light(cls):
+        """
+        Construit un roster partiel à partir de la seule liste /pokemon (une requête) :
+        espèces et générations inconnues, formes repérées par leur id.
+        """
+        entries = []
+        for entry in list_resources("pokemon"):
+            poke_id = resource_id(entry["url"])
+            entries.append(RosterEntry(poke_id, entry["name"], None, None, poke_id < FIRST_FORM_ID))
+        return cls(entries, complete=False)
+
+    @classmethod
+    def load(cls, path=ROSTER_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["entries"], complete=data["complete"])
+
+    def save(self, path=ROSTER_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump({"complete": self.complete, "entries": self.entries}, file, separators=(",", ":"))
+
+    def get(self, pokemon_name):
+        """
+        Retourne l'entrée d'un Pokémon (nom ou id), ou None.
+        """
+        return self._by_key.get(pokeapi.normalize_key(pokemon_name))
+
+    def filter(self, generation=None, forms=False):
+        """
+        Retourne les entrées correspondant à un filtre (résultat mémorisé).
+        Args:
+            generation: Numéro de génération (1-9) ou None pour toutes
+            forms: True pour inclure les formes alternatives (méga, régionales, ...)
+        Returns:
+            Tuple de RosterEntry
+        """
+        key = (generation, forms)
+        entries = self._filtered.get(key)
+        if entries is None:
+            if generation is not None and not self.complete:
+                raise ValueError("Roster partiel : lancer `python roster.py build` pour filtrer par génération")
+            entries = tuple(
+                entry for entry in self.entries
+                if (forms or entry.is_default) and (generation is None or entry.generation == int(generation))
+            )
+            with self._lock:
+                self._filtered[key] = entries
+        return entries
+
+    def random_entry(self, generation=None, forms=False, rng=random):
+        """
+        Tire un Pokémon au hasard.
+        Returns:
+            RosterEntry
+        """
+        return rng.choice(self.filter(generation, forms))
+
+    def sampler(self, generation=None, forms=False, rng=None):
+        """
+        Retourne un tireur sans remise (aucun Pokémon répété avant d'avoir vu toute la liste).
+        """
+        return RosterSampler(self.filter(generation, forms), rng)
+
+    def __contains__(self, pokemon_name):
+        return self.get(pokemon_name) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RosterSampler:
+    """
+    Tirage sans remise dans une liste d'entrées, mélangée à nouveau une fois épuisée.
+    """
+
+    def __init__(self, entries, rng=None):
+        self._entries = list(entries)
+        self._rng = rng or random.Random()
+        self._remaining = []
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if not self._remaining:
+                self._remaining = self._entries[:]
+                self._rng.shuffle(self._remaining)
+            return self._remaining.pop()
+
+
+_roster = None
+_roster_lock = threading.Lock()
+
+
+def get_roster(path=ROSTER_PATH):
+    """
+    Retourne le roster, chargé au premier appel.
+    Depuis le disque s'il a été construit, sinon construit complètement
+    si un snapshot est utilisé, sinon en version partielle (une requête).
+    """
+    global _roster
+    if _roster is None:
+        with _roster_lock:
+            if _roster is None:
+                if os.path.exists(path):
+                    _roster = Roster.load(path)
+                elif pokeapi.has_snapshot():
+                    _roster = Roster.build()
+                    _roster.save(path)
+                else:
+                    _roster = Roster.build_light()
+    return _roster
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roster des Pokémon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit le roster complet à partir de PokéAPI")
+    build_parser.add_argument("path", nargs="?", default=ROSTER_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        roster = Roster.build()
+        roster.save(args.path)
+        print(f"{len(roster)} Pokémon écrits dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,15 @@
-import random
-import requests
-from PIL import Image
-import urllib.request
-import difflib 
+from ability_store import get_ability_store
+from cry_cache import get_cry_cache
+from learnset_index import get_learnset_index
+from metrics import instrumented
+from name_index import get_name_index
+from pokeapi import get_pokemon_record, get_resource
+from roster import get_roster
+from sprite_cache import get_sprite_cache
+from sprite_table import get_pokemon_sprites, is_raster, pick_random_sprite
+from type_index import get_type_index
+
+OPEN_IMAGE_SCALE = 20
 
 GENERATION_DICT = {
     "1": "generation-i",
@@ -23,6 +30,22 @@ GUESS_FROM_SPRITE_LANG = {
     "de": "Wie heißt dieses Pokémon?",
 }
 
+_stat_store_importable = True
+
+def _get_stat_store():
+    # Le store des statistiques n'est utilisé que s'il a été construit (et si NumPy est installé)
+    global _stat_store_importable
+    if not _stat_store_importable:
+        return None
+    try:
+        from stat_store import get_stat_store
+    except ImportError:
+        # Un import raté n'est pas mis en cache par Python : on ne le retente pas à chaque appel
+        _stat_store_importable = False
+        return None
+    return get_stat_store(build=False)
+
+@instrumented
 def get_poke_sprite(pokemon_name, generation=None, game_version=None, shiny=False, female=False, showdown_sprite=False, home_sprite=False, official_artwork=False):
     """
     Affiche le sprite d'un Pokémon avec différentes options.
@@ -33,109 +56,39 @@ def get_poke_sprite(pokemon_name, generation=None, game_version=None, shiny=Fals
         game_version: Version spécifique du jeu (ex: "red-blue", "gold", "ruby-sapphire", etc.)
         shiny: True pour la version shiny
         female: True pour la version femelle (si disponible)
+    Returns:
+        URL du sprite, avec repli sur le sprite "home" si la variante n'existe pas
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
-    
-    # Déterminer quel sprite utiliser
-    sprite_url = None
-    
-    if official_artwork:
-        sprite_url = poke["sprites"]["other"]["official-artwork"]["front_default"] if not shiny else poke["sprites"]["other"]["official-artwork"]["front_shiny"]
-    elif home_sprite:
-        if shiny and female:
-            sprite_url = poke["sprites"]["other"]["home"]["front_shiny_female"]
-        elif shiny:
-            sprite_url = poke["sprites"]["other"]["home"]["front_shiny"]
-        elif female:
-            sprite_url = poke["sprites"]["other"]["home"]["front_female"]
-        else:
-            sprite_url = poke["sprites"]["other"]["home"]["front_default"]
-    elif showdown_sprite:
-        if shiny and female:
-            sprite_url = poke["sprites"]["other"]["showdown"]["front_shiny_female"]
-        elif shiny:
-            sprite_url = poke["sprites"]["other"]["showdown"]["front_shiny"]
-        elif female:
-            sprite_url = poke["sprites"]["other"]["showdown"]["front_female"]
-        else:
-            sprite_url = poke["sprites"]["other"]["showdown"]["front_default"]
-    elif generation and str(generation) in GENERATION_DICT:
-        # Sprite d'une génération spécifique
-        gen_key = GENERATION_DICT[str(generation)]
-        versions = poke["sprites"]["versions"].get(gen_key, {})
-        
-        if game_version and game_version in versions:
-            # Version de jeu spécifique
-            game_sprites = versions[game_version]
-        elif versions:
-            # Prendre la première version disponible de la génération
-            game_sprites = list(versions.values())[0]
-        else:
-            print(f"Génération {generation} non disponible pour {pokemon_name}")
-            game_sprites = {}
-        
-        # Construire le nom du sprite selon les options
-        if isinstance(game_sprites, dict) and 'animated' in game_sprites:
-            game_sprites = game_sprites['animated']
-        
-        if shiny and female:
-            sprite_url = game_sprites.get("front_shiny_female")
-        elif shiny:
-            sprite_url = game_sprites.get("front_shiny")
-        elif female:
-            sprite_url = game_sprites.get("front_female")
-        else:
-            sprite_url = game_sprites.get("front_default")
-    else:
-        # Sprite par défaut (le plus récent)
-        if shiny and female:
-            sprite_url = poke["sprites"].get("front_shiny_female")
-        elif shiny:
-            sprite_url = poke["sprites"].get("front_shiny")
-        elif female:
-            sprite_url = poke["sprites"].get("front_female")
-        else:
-            sprite_url = poke["sprites"].get("front_default")
-    
-    if sprite_url:
-        return sprite_url
-    else:
-        # Prendre celui du home normal ou shiny si pas dispo
-        sprite_url = poke["sprites"]["other"]["home"]["front_default"] if not shiny else poke["sprites"]["other"]["home"]["front_shiny"]
-        return sprite_url
+    return get_pokemon_sprites(pokemon_name).resolve(
+        generation, game_version, shiny, female, showdown_sprite, home_sprite, official_artwork
+    )
 
-def import_all_learned_moves(pokemon_name, generation=None):
+@instrumented
+def import_all_learned_moves(pokemon_name, generation=None, method=None):
     """
     Importe et retourne toutes les attaques apprises par un Pokémon. 
-    Prendre la dernière génération où le pokémon est si generation no précisée.
+    Prendre la dernière génération où le pokémon est si generation non précisée.
     Args:
         pokemon_name: Nom du Pokémon
-        generation: Génération spécifique (1-9) ou None pour la dernière génération et on cherche la dernière
+        generation: Génération spécifique (1-9) ou None pour la dernière génération où le Pokémon apprend des attaques
+        method: Méthode d'apprentissage ("level-up", "machine", "egg", "tutor", ...) ou None pour toutes
     Returns:
-        Liste des noms des attaques apprises
+        Liste triée des noms des attaques apprises
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
-
-    learned_moves = [move["move"]["name"] for move in poke["moves"]]
-    return learned_moves
+    return get_learnset_index().moves_of(pokemon_name, generation, method)
 
+@instrumented
 def get_last_pokemon_generation(pokemon_name):
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
-
-    if generation is None:
-        for i in range(9, 1, -1):
-            gen_key = GENERATION_DICT[str(i)]
-            if poke["versions"][gen_key]:
-                generation = i
-                break
-    return generation
+    """
+    Retourne la dernière génération où un Pokémon apprend des attaques.
+    Args:
+        pokemon_name: Nom du Pokémon
+    Returns:
+        Numéro de génération (1-9), ou None
+    """
+    return get_learnset_index().last_generation(pokemon_name)
 
+@instrumented
 def get_pokemon_types(pokemon_name):
     """
     Retourne les types d'un Pokémon donné.
@@ -144,13 +97,12 @@ def get_pokemon_types(pokemon_name):
     Returns:
         Liste des types du Pokémon
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
+    poke = get_pokemon_record(pokemon_name)
     
     types = [t["type"]["name"] for t in poke["types"]]
     return types
 
+@instrumented
 def get_pokemon_list_from_types(type1, type2=None):
     """
     Recherche des Pokémon par types.
@@ -160,23 +112,44 @@ def get_pokemon_list_from_types(type1, type2=None):
     Returns:
         Liste des noms des Pokémon correspondant aux types
     """
-    url = f"https://pokeapi.co/api/v2/type/{type1}"
-    response = requests.get(url)
-    type_data = response.json()
-    
-    pokemon_list = [p["pokemon"]["name"] for p in type_data["pokemon"]] # type_data["pokemon"] est une liste de dictionnaires
-    
-    if type2:
-        url2 = f"https://pokeapi.co/api/v2/type/{type2}"
-        response2 = requests.get(url2)
-        type_data2 = response2.json()
-        
-        pokemon_list_type2 = {p["pokemon"]["name"] for p in type_data2["pokemon"]}
-        # Filtrer les Pokémon qui ont les deux types
-        pokemon_list = [p for p in pokemon_list if p in pokemon_list_type2]
-    
-    return pokemon_list
+    types = (type1, type2) if type2 else (type1,)
+    # Intersection des bitsets de l'index des types (construit une seule fois)
+    return get_type_index().all_of(*types)
+
+def _get_type_chart():
+    # NumPy n'est nécessaire que pour la table des types : importée à la demande
+    from type_chart import get_type_chart
+
+    return get_type_chart()
+
+@instrumented
+def get_type_effectiveness(attacking_type, defending_type1, defending_type2=None):
+    """
+    Retourne le multiplicateur de dégâts d'un type d'attaque contre un ou deux types.
+    Args:
+        attacking_type: Type de l'attaque (ex: "ice")
+        defending_type1: Premier type du défenseur
+        defending_type2: Deuxième type du défenseur (optionnel)
+    Returns:
+        Multiplicateur (0, 0.25, 0.5, 1, 2 ou 4)
+    """
+    types = (defending_type1, defending_type2) if defending_type2 else (defending_type1,)
+    return _get_type_chart().multiplier(attacking_type, types)
 
+@instrumented
+def get_pokemon_weaknesses(pokemon_name):
+    """
+    Retourne les types d'attaque efficaces contre un Pokémon.
+    Args:
+        pokemon_name: Nom du Pokémon
+    Returns:
+        Dictionnaire type d'attaque -> multiplicateur (2 ou 4)
+    """
+    types = get_type_index().types_of(pokemon_name) or get_pokemon_types(pokemon_name)
+    profile = _get_type_chart().defensive_profile(types)
+    return {type_name: multiplier for type_name, multiplier in profile.items() if multiplier > 1}
+
+@instrumented
 def get_ability_name_translation(ability_name, target_language="fr"):
     """
     Retourne la traduction du nom d'une capacité dans la langue spécifiée.
@@ -186,48 +159,34 @@ def get_ability_name_translation(ability_name, target_language="fr"):
     Returns:
         Nom traduit du talent
     """
-    url = f"https://pokeapi.co/api/v2/ability/{ability_name}"
-    response = requests.get(url)
-    ability_data = response.json()
-    
-    translated_name = None
-    for entry in ability_data["names"]:
-        if entry["language"]["name"] == target_language:
-            translated_name = entry["name"]
-            break
-    
-    return translated_name
+    return get_ability_store().get(ability_name).names.get(target_language)
 
+@instrumented
 def get_ability_description(ability_name, language="en"):
     """
     Retourne la description d'une capacité dans la langue spécifiée. 
     Args:
-        ability_name: Nom du talent
+        ability_name: Nom du talent (les espaces et "_" sont acceptés à la place des "-")
         language: Code de la langue (ex: "en", "fr", etc.)
     Returns:
-        Description du talent
+        Tuple (nom traduit, description la plus récente)
     """
-    # Petite correction de ability_name pour les capacités avec des espaces ou des traits d'union
-    for i_car in range(len(ability_name)):
-        if ability_name[i_car] == " " or ability_name[i_car] == "_":
-            ability_name[i_car] = "-"
-
+    record = get_ability_store().get(ability_name)
+    return record.names.get(language), record.descriptions.get(language)
 
-    url = f"https://pokeapi.co/api/v2/ability/{ability_name}"
-    response = requests.get(url)
-    ability_data = response.json()
-    desc = None
-
-    for entry in ability_data["flavor_text_entries"][::-1]: # On prend la dernière entrée pour avoir la description la plus récente
-        print(entry)
-        if entry["language"]["name"] == language:
-            desc = entry["flavor_text"].replace("\n", " ").replace("\f", " ")
-            break
-    
-    name = get_ability_name_translation(ability_name, target_language=language)
-
-    return name, desc
+@instrumented
+def describe_ability(ability_name, languages=("fr", "en")):
+    """
+    Retourne le nom et la description d'un talent dans la première langue disponible.
+    Args:
+        ability_name: Nom du talent
+        languages: Langues par ordre de préférence
+    Returns:
+        Tuple (nom traduit, description), (None, None) si aucune description
+    """
+    return get_ability_store().describe(ability_name, languages)
 
+@instrumented
 def get_pokemon_name_list(pokemon_name):
     """
     Retourne une liste de noms de Pokémon similaires à celui donné.
@@ -236,13 +195,16 @@ def get_pokemon_name_list(pokemon_name):
     Returns:
         Liste des noms dans toutes les langues
     """
-    url = f"https://pokeapi.co/api/v2/pokemon-species/{pokemon_name}"
-    response = requests.get(url)
-    species_data = response.json()
+    index = get_name_index(build=False)
+    if index is not None and pokemon_name in index:
+        return index.names_of(pokemon_name)
+
+    species_data = get_resource("pokemon-species", pokemon_name)
     
     name_list = { entry["language"]["name"] : entry["name"] for entry in species_data["names"]}
     return name_list
 
+@instrumented
 def get_pokemon_name_translation(pokemon_name, target_language="fr"):
     """
     Retourne la traduction du nom d'un Pokémon dans la langue spécifiée.
@@ -252,9 +214,11 @@ def get_pokemon_name_translation(pokemon_name, target_language="fr"):
     Returns:
         Nom traduit du Pokémon
     """
-    url = f"https://pokeapi.co/api/v2/pokemon-species/{pokemon_name}"
-    response = requests.get(url)
-    species_data = response.json()
+    index = get_name_index(build=False)
+    if index is not None and pokemon_name in index:
+        return index.translate(pokemon_name, target_language)
+
+    species_data = get_resource("pokemon-species", pokemon_name)
     
     translated_name = None
     for entry in species_data["names"]:
@@ -264,21 +228,43 @@ def get_pokemon_name_translation(pokemon_name, target_language="fr"):
     
     return translated_name
 
-def download_pokemon_cry(pokemon_name):
+@instrumented
+def get_pokemon_slug(pokemon_name, language=None):
+    """
+    Retrouve le nom PokéAPI (slug) d'une espèce à partir de son nom dans n'importe quelle langue.
+    Args:
+        pokemon_name: Nom localisé (ex: "Dracaufeu", "Glurak") ou slug
+        language: Code de la langue du nom donné (None pour chercher dans toutes)
+    Returns:
+        Slug de l'espèce (ex: "charizard"), ou None si inconnu
+    """
+    return get_name_index().slug_for(pokemon_name, language)
+
+@instrumented
+def download_pokemon_cry(pokemon_name, variant="latest"):
     """
-    Télécharge le cri d'un Pokémon depuis PokéAPI.
+    Retourne l'URL du cri d'un Pokémon depuis PokéAPI.
     Args:
         pokemon_name: Nom du Pokémon
+        variant: "latest" (cri actuel) ou "legacy" (cri des anciens jeux)
     Returns:
-        URL du fichier audio du cri
+        URL du fichier audio du cri, ou None si cette variante n'existe pas
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
-    
-    cry_url = poke["cries"].get("latest")
-    return cry_url
+    return get_cry_cache().cry_url(pokemon_name, variant)
+
+@instrumented
+def get_pokemon_cry_file(pokemon_name, variant="latest"):
+    """
+    Télécharge (une seule fois) le cri d'un Pokémon.
+    Args:
+        pokemon_name: Nom du Pokémon
+        variant: "latest" ou "legacy"
+    Returns:
+        Chemin local du fichier .ogg, ou None si cette variante n'existe pas
+    """
+    return get_cry_cache().get_path(pokemon_name, variant)
 
+@instrumented
 def get_pokemon_base_stats(pokemon_name):
     """
     Retourne les statistiques de base d'un Pokémon.
@@ -287,13 +273,16 @@ def get_pokemon_base_stats(pokemon_name):
     Returns:
         Dictionnaire des statistiques de base
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
+    store = _get_stat_store()
+    if store is not None and pokemon_name in store:
+        return store.base_stats(pokemon_name)
+
+    poke = get_pokemon_record(pokemon_name)
     
     base_stats = {stat["stat"]["name"]: stat["base_stat"] for stat in poke["stats"]}
     return base_stats
 
+@instrumented
 def get_pokemon_height_weight(pokemon_name):
     """
     Retourne la taille et le poids d'un Pokémon.
@@ -302,14 +291,17 @@ def get_pokemon_height_weight(pokemon_name):
     Returns:
         Tuple (taille en décimètres, poids en hectogrammes)
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
+    store = _get_stat_store()
+    if store is not None and pokemon_name in store:
+        return store.height_weight(pokemon_name)
+
+    poke = get_pokemon_record(pokemon_name)
     
     height = poke["height"]
     weight = poke["weight"]
     return height, weight
 
+@instrumented
 def get_pokemon_abilities(pokemon_name):
     """
     Retourne les capacités d'un Pokémon.
@@ -318,33 +310,27 @@ def get_pokemon_abilities(pokemon_name):
     Returns:
         Liste des noms des capacités
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}"
-    response = requests.get(url)
-    poke = response.json()
+    poke = get_pokemon_record(pokemon_name)
     
     abilities = [ability["ability"]["name"] for ability in poke["abilities"]]
     return abilities
 
+@instrumented
 def get_pokeball_list():
     """
     Retourne la liste des Pokéballs disponibles dans PokéAPI.
     Returns:
         Liste des noms des Pokéballs
     """
-    url1 = "https://pokeapi.co/api/v2/item-category/33/"
-    url2 = "https://pokeapi.co/api/v2/item-category/34/"
-    url3 = "https://pokeapi.co/api/v2/item-category/39/"
-    response1 = requests.get(url1)
-    response2 = requests.get(url2)
-    response3 = requests.get(url3)
-    category_data1 = response1.json()
-    category_data2 = response2.json()
-    category_data3 = response3.json()
+    category_data1 = get_resource("item-category", 33)
+    category_data2 = get_resource("item-category", 34)
+    category_data3 = get_resource("item-category", 39)
     pokeballs = [item["name"] for item in category_data1["items"]]
     pokeballs += [item["name"] for item in category_data2["items"]]
     pokeballs += [item["name"] for item in category_data3["items"]]
     return pokeballs
 
+@instrumented
 def get_pokeball_sprite(pokeball_name):
     """
     Retourne l'URL du sprite d'une Pokéball.
@@ -353,52 +339,50 @@ def get_pokeball_sprite(pokeball_name):
     Returns:
         URL du sprite de la Pokéball
     """
-    url = f"https://pokeapi.co/api/v2/item/{pokeball_name}"
-    response = requests.get(url)
-    item_data = response.json()
+    item_data = get_resource("item", pokeball_name)
     
     sprite_url = item_data["sprites"]["default"]
     return sprite_url
 
+@instrumented
 def open_image_from_url(image_url):
     """
     Ouvre et affiche une image depuis une URL.
     Args:
         image_url: URL de l'image
     """
-    urllib.request.urlretrieve(image_url, "temp_image.png")
-    img = Image.open("temp_image.png")
-    img = img.resize((img.width * 20, img.height * 20)) # agrandir l'image
-    img.show()
+    # Sprite mis en cache et agrandi sans lissage, sans fichier temporaire
+    get_sprite_cache().get_image(image_url, OPEN_IMAGE_SCALE).show()
 
+@instrumented
 def select_random_pokemon():
     """
     Sélectionne un Pokémon aléatoire.
     Returns:
         Nom du Pokémon sélectionné
     """
-    url = "https://pokeapi.co/api/v2/pokemon?limit=10000"
-    response = requests.get(url)
-    poke_list = response.json()["results"]
-    
-    import random
-    random_pokemon = random.choice(poke_list)
-    return random_pokemon["name"]
+    return get_roster().random_entry().slug
 
+@instrumented
 def guess_the_pokemon_from_sprite(language="en"):
-    pokemon_name = select_random_pokemon()
-    L = [False, False, False]
-    L[random.randint(0, 2)] = True
-    gen = random.randint(1,9)
+    # Import local : quiz_engine dépend de quiz_rounds, qui importe ce module
+    from quiz_engine import QuizEngine
 
-    sprite_url = get_poke_sprite(pokemon_name, generation=gen, showdown_sprite=L[0], home_sprite=L[1], official_artwork=L[2])
+    engine = QuizEngine()
+    question = engine.new_round("sprite")
+    pokemon_name = question.round.answer_name
+    # Seules les variantes existantes sont tirées : pas de sprite manquant
+    sprite_url = pick_random_sprite(pokemon_name, shiny=False, female=False) or question.round.sprite_url
+    if not sprite_url or not is_raster(sprite_url):
+        raise ValueError(f"Sprite illisible (ni PNG ni GIF) : {sprite_url}")
     open_image_from_url(sprite_url)
-    name_list = get_pokemon_name_list(pokemon_name)
     name_given = input(GUESS_FROM_SPRITE_LANG.get(language, "What is the name of this Pokemon?") + " ")
 
-    if name_given.lower().strip() in [name.lower() for name in name_list.values()]:
+    verdict = engine.answer(question.id, name_given)
+    if verdict.correct:
         print("Correct!")
     else:
+        name_list = get_pokemon_name_list(question.round.species_name)
         print(f"Wrong! The correct answer was: {name_list.get(language, pokemon_name)} ({pokemon_name})")
 
 if __name__ == "__main__":
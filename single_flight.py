@@ -0,0 +1,116 @@
+import threading
+
+import metrics
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Regroupe les appels simultanés identiques (threads) : pour une même clé,
+    un seul appel s'exécute et les appelants arrivés pendant ce temps attendent son résultat.
+
+    Le résultat est partagé tel quel entre tous les appelants : ne pas le modifier.
+    Une exception est relancée chez chacun d'eux. Rien n'est gardé une fois l'appel terminé
+    (ce n'est pas un cache).
+    """
+
+    def __init__(self, name="single_flight"):
+        """
+        Args:
+            name: Nom sous lequel les appels regroupés sont comptés (metrics.record_cache)
+        """
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Exécute func(*args, **kwargs), sauf si un appel de même clé est déjà en cours :
+        attend alors son résultat.
+        Args:
+            key: Clé identifiant l'appel (ex: l'URL demandée)
+            func: Fonction bloquante à exécuter
+        Returns:
+            Le résultat de func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        metrics.record_cache(self.name, not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """
+        Retourne le nombre d'appels en cours.
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Équivalent asyncio de SingleFlight, pour une boucle d'événements.
+
+    L'appel partagé tourne dans sa propre tâche : l'annulation d'un appelant
+    n'interrompt pas les autres.
+    """
+
+    def __init__(self, name="single_flight"):
+        self.name = name
+        self._tasks = {}
+
+    async def do(self, key, coroutine_func, *args, **kwargs):
+        """
+        Attend coroutine_func(*args, **kwargs), partagée entre les appelants de même clé.
+        """
+        import asyncio  # ~40 ms à l'import : seulement pour les appelants asyncio
+
+        task = self._tasks.get(key)
+        metrics.record_cache(self.name, task is not None)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _task: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def run(self, key, func, *args, executor=None):
+        """
+        Exécute une fonction bloquante dans un pool de threads, partagée entre les appelants de même clé.
+        Args:
+            key: Clé identifiant l'appel
+            func: Fonction bloquante
+            executor: Pool de threads (None : pool par défaut de la boucle)
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await self.do(key, loop.run_in_executor, executor, func, *args)
+
+    def in_flight(self):
+        return len(self._tasks)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pokeapi
+
+MIRRORED_ENDPOINTS = ("pokemon", "pokemon-species", "ability", "type")
+POKEBALL_CATEGORIES = (33, 34, 39)
+DEFAULT_WORKERS = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    endpoint TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (endpoint, name)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS resources_id ON resources (endpoint, id);
+"""
+
+
+class Snapshot:
+    """
+    Copie locale de PokéAPI dans un fichier SQLite.
+
+    Chaque ressource est stockée compressée (zlib) et indexée par
+    (endpoint, nom) et (endpoint, id).
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Chemin du fichier SQLite
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def get(self, endpoint, name):
+        """
+        Retourne une ressource du snapshot.
+        Args:
+            endpoint: Endpoint de l'API (ex: "pokemon")
+            name: Nom ou id normalisé (voir pokeapi.normalize_key)
+        Returns:
+            Données JSON de la ressource, ou None si absente
+        """
+        column = "id" if name.isdigit() else "name"
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT body FROM resources WHERE endpoint = ? AND {column} = ?",
+                (endpoint, int(name) if column == "id" else name),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def list(self, endpoint):
+        """
+        Retourne la liste des ressources d'un endpoint, au format des listes PokéAPI.
+        Args:
+            endpoint: Endpoint de l'API
+        Returns:
+            Liste de dictionnaires {"name", "url"} triée par id
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, id FROM resources WHERE endpoint = ? ORDER BY id", (endpoint,)
+            ).fetchall()
+        client = pokeapi.get_client()
+        return [{"name": name, "url": client.url_for(f"{endpoint}/{poke_id}/")} for name, poke_id in rows]
+
+    def put(self, endpoint, data):
+        """
+        Ajoute (ou remplace) une ressource dans le snapshot.
+        """
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?)",
+                (endpoint, data["name"], data["id"], body),
+            )
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def count(self, endpoint):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM resources WHERE endpoint = ?", (endpoint,)
+            ).fetchone()[0]
+
+
+def mirror(path, workers=DEFAULT_WORKERS, log=print):
+    """
+    Télécharge toutes les ressources utiles de PokéAPI dans un snapshot local.
+    Args:
+        path: Chemin du fichier SQLite à écrire
+        workers: Nombre de téléchargements en parallèle
+        log: Fonction d'affichage de la progression (None pour rien afficher)
+    Returns:
+        Le Snapshot écrit
+    """
+    snapshot = Snapshot(path)
+
+    def download(endpoint, urls):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for data in executor.map(pokeapi.fetch_json, urls):
+                snapshot.put(endpoint, data)
+        snapshot.commit()
+        if log:
+            log(f"{endpoint}: {snapshot.count(endpoint)} ressources")
+
+    for endpoint in MIRRORED_ENDPOINTS:
+        results = pokeapi.fetch_json(f"{endpoint}?limit=100000")["results"]
+        download(endpoint, [entry["url"] for entry in results])
+
+    categories = [f"item-category/{category_id}/" for category_id in POKEBALL_CATEGORIES]
+    download("item-category", categories)
+    item_urls = []
+    for category_id in POKEBALL_CATEGORIES:
+        category = snapshot.get("item-category", str(category_id))
+        item_urls += [item["url"] for item in category["items"]]
+    download("item", item_urls)
+    return snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot local de PokéAPI")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    mirror_parser = subparsers.add_parser("mirror", help="Télécharge toutes les données dans un snapshot")
+    mirror_parser.add_argument("path", nargs="?", default=os.path.join(pokeapi.CACHE_DIR, "snapshot.sqlite"))
+    mirror_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    if args.command == "mirror":
+        mirror(args.path, workers=args.workers).close()
+        print(f"Snapshot écrit dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from pokeapi import CACHE_DIR, normalize_key
+from roster import get_roster
+from sprite_cache import get_sprite_cache
+from sprite_table import get_pokemon_sprites
+
+ATLAS_DIR = os.environ.get("POKESSENTIAL_ATLAS_DIR", os.path.join(CACHE_DIR, "atlas"))
+BUILD_WORKERS = 8
+DEFAULT_VARIANT = {"source": "default", "generation": None, "game_version": None, "shiny": False, "female": False, "animated": False}
+# Poids de luminance ITU-R BT.601
+GRAYSCALE_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def _numpy():
+    # NumPy n'est nécessaire que pour l'atlas : importé à la demande
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("L'atlas de sprites nécessite NumPy : pip install numpy") from None
+    return numpy
+
+
+def variant_name(variant):
+    """
+    Nom de fichier d'une variante (ex: "default", "game-3-emerald-shiny").
+    """
+    parts = [variant["source"]]
+    if variant.get("generation") is not None:
+        parts.append(str(variant["generation"]))
+    if variant.get("game_version"):
+        parts.append(variant["game_version"])
+    parts.extend(flag for flag in ("shiny", "female", "animated") if variant.get(flag))
+    return "-".join(parts)
+
+
+def upscale(pixels, factor):
+    """
+    Agrandit une image ou un lot d'images d'un facteur entier (pixels nets).
+    Args:
+        pixels: Tableau (..., hauteur, largeur, 4)
+        factor: Facteur d'agrandissement entier
+    """
+    if factor == 1:
+        return pixels
+    return pixels.repeat(factor, axis=-3).repeat(factor, axis=-2)
+
+
+def silhouette(pixels, color=(0, 0, 0)):
+    """
+    Remplit d'une couleur unie tous les pixels visibles (« Quel est ce Pokémon ? »).
+    Args:
+        pixels: Tableau (..., hauteur, largeur, 4)
+        color: Couleur RGB de la silhouette
+    """
+    np = _numpy()
+    result = pixels.copy()
+    visible = pixels[..., 3] > 0
+    result[..., :3] = np.where(visible[..., None], np.asarray(color, dtype=np.uint8), 0)
+    return result
+
+
+def grayscale(pixels):
+    """
+    Convertit une image ou un lot d'images en niveaux de gris (transparence conservée).
+    Args:
+        pixels: Tableau (..., hauteur, largeur, 4)
+    """
+    np = _numpy()
+    result = pixels.copy()
+    luminance = pixels[..., :3] @ np.asarray(GRAYSCALE_WEIGHTS, dtype=np.float32)
+    result[..., :3] = np.rint(luminance)[..., None].astype(np.uint8)
+    return result
+
+
+def to_image(pixels):
+    """
+    Convertit un tableau (hauteur, largeur, 4) en image PIL RGBA.
+    """
+    from PIL import Image
+
+    return Image.fromarray(_numpy().ascontiguousarray(pixels), "RGBA")
+
+
+class SpriteAtlas:
+    """
+    Tous les sprites d'une variante dans un seul tableau NumPy mappé en mémoire.
+
+    Fichiers : {nom}.npy, tableau uint8 (n, hauteur, largeur, 4) où chaque
+    sprite occupe le coin supérieur gauche de sa case, et {nom}.json, l'index
+    (variante, taille des cases, [slug, id, hauteur, largeur] par sprite).
+    """
+
+    def __init__(self, pixels, entries, variant):
+        """
+        Args:
+            pixels: Tableau (n, hauteur, largeur, 4), éventuellement mappé en mémoire
+            entries: Liste de (slug, id, hauteur, largeur), dans l'ordre des cases
+            variant: Champs de SpriteKey décrivant la variante
+        """
+        self.pixels = pixels
+        self.entries = [tuple(entry) for entry in entries]
+        self.variant = variant
+        self._slots = {}
+        for slot, (slug, poke_id, _, _) in enumerate(self.entries):
+            self._slots[slug] = slot
+            self._slots[str(poke_id)] = slot
+
+    @classmethod
+    def build(cls, pokemon_names, variant=DEFAULT_VARIANT, directory=ATLAS_DIR, workers=BUILD_WORKERS):
+        """
+        Télécharge (via le cache de sprites) et empile les sprites d'une variante.
+        Les Pokémon sans cette variante sont ignorés.
+        Args:
+            pokemon_names: Noms des Pokémon à inclure
+            variant: Champs de SpriteKey (source, generation, game_version, shiny, female, animated)
+            directory: Dossier où écrire l'atlas
+        """
+        np = _numpy()
+        from PIL import Image
+
+        def decode(pokemon_name):
+            sprites = get_pokemon_sprites(pokemon_name)
+            url = sprites.url(**variant)
+            if url is None:
+                return None
+            image = Image.open(BytesIO(get_sprite_cache().get_bytes(url))).convert("RGBA")
+            return sprites.name, sprites.id, np.asarray(image)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            decoded = [result for result in executor.map(decode, pokemon_names) if result is not None]
+
+        height = max((array.shape[0] for _, _, array in decoded), default=1)
+        width = max((array.shape[1] for _, _, array in decoded), default=1)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, variant_name(variant))
+        pixels = np.lib.format.open_memmap(f"{base}.npy", mode="w+", dtype=np.uint8, shape=(len(decoded), height, width, 4))
+        entries = []
+        for slot, (slug, poke_id, array) in enumerate(decoded):
+            pixels[slot, :array.shape[0], :array.shape[1]] = array
+            entries.append((slug, poke_id, array.shape[0], array.shape[1]))
+        pixels.flush()
+        with open(f"{base}.json", "w", encoding="utf-8") as file:
+            json.dump({"variant": variant, "cell": [height, width], "entries": entries}, file, separators=(",", ":"))
+        return cls(pixels, entries, variant)
+
+    @classmethod
+    def load(cls, variant=DEFAULT_VARIANT, directory=ATLAS_DIR):
+        """
+        Ouvre un atlas construit (mappé en lecture seule, rien n'est chargé d'avance).
+        """
+        base = os.path.join(directory, variant_name(variant))
+        with open(f"{base}.json", encoding="utf-8") as file:
+            index = json.load(file)
+        pixels = _numpy().load(f"{base}.npy", mmap_mode="r")
+        return cls(pixels, index["entries"], index["variant"])
+
+    def slot(self, pokemon_name):
+        """
+        Retourne la case d'un Pokémon (nom ou id), ou None s'il n'est pas dans l'atlas.
+        """
+        return self._slots.get(normalize_key(pokemon_name))
+
+    def get(self, pokemon_name):
+        """
+        Retourne les pixels d'un sprite, rognés à sa taille (vue sur l'atlas, sans copie).
+        Returns:
+            Tableau (hauteur, largeur, 4), ou None si le Pokémon n'est pas dans l'atlas
+        """
+        slot = self.slot(pokemon_name)
+        if slot is None:
+            return None
+        _, _, height, width = self.entries[slot]
+        return self.pixels[slot, :height, :width]
+
+    def batch(self, pokemon_names):
+        """
+        Retourne les cases de plusieurs Pokémon d'un coup, pour les traitements par lot.
+        Returns:
+            Tableau (n, hauteur de case, largeur de case, 4)
+        """
+        pokemon_names = list(pokemon_names)
+        slots = [self.slot(name) for name in pokemon_names]
+        if None in slots:
+            raise LookupError(f"Absent de l'atlas : {pokemon_names[slots.index(None)]}")
+        return self.pixels[slots]
+
+    def image(self, pokemon_name, scale=1, hidden=False):
+        """
+        Retourne le sprite d'un Pokémon sous forme d'image PIL, agrandi et éventuellement en silhouette.
+        Returns:
+            Image PIL, ou None si le Pokémon n'est pas dans l'atlas
+        """
+        pixels = self.get(pokemon_name)
+        if pixels is None:
+            return None
+        if hidden:
+            pixels = silhouette(pixels)
+        return to_image(upscale(pixels, scale))
+
+    def __contains__(self, pokemon_name):
+        return self.slot(pokemon_name) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_atlases = {}
+_atlases_lock = threading.Lock()
+
+
+def get_sprite_atlas(variant=DEFAULT_VARIANT, directory=ATLAS_DIR):
+    """
+    Retourne l'atlas d'une variante s'il a été construit (et si NumPy est installé), sinon None.
+    """
+    name = variant_name(variant)
+    if name not in _atlases:
+        with _atlases_lock:
+            if name not in _atlases:
+                try:
+                    _atlases[name] = SpriteAtlas.load(variant, directory)
+                except (FileNotFoundError, ImportError):
+                    _atlases[name] = None
+    return _atlases[name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atlas de sprites")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit l'atlas d'une variante pour tout le Pokédex")
+    build_parser.add_argument("--source", default="default")
+    build_parser.add_argument("--generation", type=int)
+    build_parser.add_argument("--game-version")
+    build_parser.add_argument("--shiny", action="store_true")
+    build_parser.add_argument("--female", action="store_true")
+    build_parser.add_argument("--animated", action="store_true")
+    build_parser.add_argument("--forms", action="store_true", help="Inclure les formes alternatives")
+    build_parser.add_argument("--directory", default=ATLAS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        variant = {
+            "source": args.source if args.generation is None else "game",
+            "generation": args.generation,
+            "game_version": args.game_version,
+            "shiny": args.shiny,
+            "female": args.female,
+            "animated": args.animated,
+        }
+        names = [entry.slug for entry in get_roster().filter(forms=args.forms)]
+        atlas = SpriteAtlas.build(names, variant, args.directory)
+        print(f"{len(atlas)} sprites écrits dans {os.path.join(args.directory, variant_name(variant))}.npy")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import metrics
+from http_client import get_client
+from pokeapi import CACHE_DIR
+
+SPRITE_DIR = os.path.join(CACHE_DIR, "sprites")
+DEFAULT_MAX_PIXELS = 16 * 1024 * 1024  # environ 64 Mo d'images RGBA
+
+
+class SpriteCache:
+    """
+    Cache des sprites à deux niveaux.
+
+    Niveau 1 : octets PNG bruts sur disque, un fichier par URL.
+    Niveau 2 : images décodées et déjà agrandies en mémoire, LRU borné
+    par le nombre total de pixels.
+    """
+
+    def __init__(self, directory=SPRITE_DIR, max_pixels=DEFAULT_MAX_PIXELS):
+        """
+        Args:
+            directory: Dossier des sprites téléchargés
+            max_pixels: Nombre maximum de pixels gardés en mémoire
+        """
+        self.directory = directory
+        self.max_pixels = max_pixels
+        self._images = OrderedDict()  # (url, scale) -> image
+        self._pixels = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, url):
+        """
+        Retourne le chemin du fichier disque associé à une URL.
+        """
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + os.path.splitext(url)[1])
+
+    def get_bytes(self, url):
+        """
+        Retourne les octets d'un sprite, téléchargé une seule fois.
+        Args:
+            url: URL du sprite
+        Returns:
+            Contenu du fichier image
+        """
+        path = self.path_for(url)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            metrics.record_cache("sprite_disk", True)
+            return data
+        except FileNotFoundError:
+            metrics.record_cache("sprite_disk", False)
+        data = get_client().get_bytes(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+        return data
+
+    def get_image(self, url, scale=1):
+        """
+        Retourne un sprite décodé et agrandi (pixels nets, filtre NEAREST).
+        L'image retournée est partagée : ne pas la modifier.
+        Args:
+            url: URL du sprite
+            scale: Facteur d'agrandissement entier
+        Returns:
+            Image PIL
+        """
+        key = (url, scale)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+        metrics.record_cache("sprite_memory", image is not None)
+        if image is not None:
+            return image
+
+        from PIL import Image
+
+        image = Image.open(BytesIO(self.get_bytes(url)))
+        if scale != 1:
+            image = image.resize((image.width * scale, image.height * scale), Image.NEAREST)
+        image.load()
+
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = image
+                self._pixels += image.width * image.height
+                while self._pixels > self.max_pixels and len(self._images) > 1:
+                    _, oldest = self._images.popitem(last=False)
+                    self._pixels -= oldest.width * oldest.height
+        return image
+
+    def clear_memory(self):
+        """
+        Vide le niveau mémoire (les fichiers disque sont conservés).
+        """
+        with self._lock:
+            self._images.clear()
+            self._pixels = 0
+
+
+_sprite_cache = None
+_sprite_cache_lock = threading.Lock()
+
+
+def get_sprite_cache():
+    """
+    Retourne le cache de sprites partagé.
+    """
+    global _sprite_cache
+    if _sprite_cache is None:
+        with _sprite_cache_lock:
+            if _sprite_cache is None:
+                _sprite_cache = SpriteCache()
+    return _sprite_cache
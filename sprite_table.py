@@ -0,0 +1,296 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pokeapi import CACHE_DIR, get_pokemon_record, normalize_key
+from roster import get_roster
+
+SPRITE_TABLE_PATH = os.environ.get("POKESSENTIAL_SPRITE_TABLE", os.path.join(CACHE_DIR, "sprites.json.gz"))
+BUILD_WORKERS = 8
+GENERATIONS = {
+    "generation-i": 1, "generation-ii": 2, "generation-iii": 3,
+    "generation-iv": 4, "generation-v": 5, "generation-vi": 6,
+    "generation-vii": 7, "generation-viii": 8, "generation-ix": 9,
+}
+_GENERATION_NUMBERS = {str(number) for number in GENERATIONS.values()}
+# Champs de face retenus -> (shiny, female). Les autres (front_gray, front_transparent,
+# front_shiny_transparent des générations I et II) ne sont pas des variantes de ces quatre-là
+FRONT_FIELDS = {
+    "front_default": (False, False),
+    "front_shiny": (True, False),
+    "front_female": (False, True),
+    "front_shiny_female": (True, True),
+}
+# Formats que PIL sait ouvrir (les sprites dream_world sont en SVG)
+RASTER_EXTENSIONS = (".png", ".gif")
+TABLE_FORMAT = 2  # à incrémenter si la mise à plat change : les tables plus anciennes sont ignorées
+
+# source : "default", "home", "official-artwork", "showdown", "dream_world" ou "game"
+SpriteKey = namedtuple("SpriteKey", ["source", "generation", "game_version", "shiny", "female", "animated"])
+
+
+def _front_sprites(sprites, source, generation=None, game_version=None, animated=False):
+    for field, (shiny, female) in FRONT_FIELDS.items():
+        url = sprites.get(field)
+        if url:
+            yield SpriteKey(source, generation, game_version, shiny, female, animated), url
+
+
+def is_raster(url):
+    """
+    Indique si un sprite est une image PNG ou GIF (et non un SVG).
+    """
+    return url.lower().endswith(RASTER_EXTENSIONS)
+
+
+class PokemonSprites:
+    """
+    Sprites de face d'un Pokémon, mis à plat une fois pour toutes :
+    chaque variante est une clé SpriteKey associée à son URL.
+    """
+
+    def __init__(self, name, poke_id, urls, games):
+        """
+        Args:
+            name: Nom du Pokémon
+            poke_id: Id du Pokémon
+            urls: Dictionnaire SpriteKey -> URL (variantes existantes uniquement)
+            games: Dictionnaire génération -> liste de (version de jeu, a des sprites animés), dans l'ordre de PokéAPI
+        """
+        self.name = name
+        self.id = poke_id
+        self.urls = urls
+        self.games = games
+
+    @classmethod
+    def from_api(cls, data):
+        """
+        Met à plat le champ "sprites" d'une réponse /pokemon/{name}.
+        """
+        sprites = data["sprites"]
+        urls = dict(_front_sprites(sprites, "default"))
+        for source, other_sprites in (sprites.get("other") or {}).items():
+            urls.update(_front_sprites(other_sprites, source))
+        games = {}
+        for generation_name, versions in (sprites.get("versions") or {}).items():
+            generation = GENERATIONS.get(generation_name)
+            if generation is None:
+                continue
+            games[generation] = []
+            for game_version, game_sprites in versions.items():
+                animated_sprites = game_sprites.get("animated")
+                games[generation].append((game_version, animated_sprites is not None))
+                urls.update(_front_sprites(game_sprites, "game", generation, game_version))
+                if animated_sprites:
+                    urls.update(_front_sprites(animated_sprites, "game", generation, game_version, True))
+        return cls(data["name"], data["id"], urls, games)
+
+    def url(self, source="default", generation=None, game_version=None, shiny=False, female=False, animated=False):
+        """
+        Retourne l'URL d'une variante exacte, ou None si elle n'existe pas.
+        """
+        return self.urls.get(SpriteKey(source, generation, game_version, shiny, female, animated))
+
+    def resolve(self, generation=None, game_version=None, shiny=False, female=False, showdown_sprite=False, home_sprite=False, official_artwork=False):
+        """
+        Choisit l'URL du sprite selon les règles de get_poke_sprite (mêmes arguments) :
+        source demandée, sinon sprite de la première version de la génération
+        (animé si la version en a), sinon sprite par défaut, et en dernier recours
+        le sprite "home".
+        """
+        if official_artwork:
+            sprite_url = self.url("official-artwork", shiny=shiny)
+        elif home_sprite:
+            sprite_url = self.url("home", shiny=shiny, female=female)
+        elif showdown_sprite:
+            sprite_url = self.url("showdown", shiny=shiny, female=female)
+        elif generation and str(generation) in _GENERATION_NUMBERS:
+            generation = int(generation)
+            games = self.games.get(generation, [])
+            chosen = next((game for game in games if game[0] == game_version), games[0] if games else None)
+            sprite_url = None
+            if chosen is not None:
+                chosen_version, has_animated = chosen
+                sprite_url = self.url("game", generation, chosen_version, shiny, female, has_animated)
+        else:
+            sprite_url = self.url("default", shiny=shiny, female=female)
+
+        return sprite_url or self.url("home", shiny=shiny)
+
+    def variants(self, **filters):
+        """
+        Retourne les variantes existantes correspondant aux filtres (ex: shiny=False).
+        """
+        return [key for key in self.urls if all(getattr(key, field) == value for field, value in filters.items())]
+
+    def to_list(self):
+        return [
+            self.name,
+            self.id,
+            [[*key, url] for key, url in self.urls.items()],
+            {str(generation): games for generation, games in self.games.items()},
+        ]
+
+    @classmethod
+    def from_list(cls, data):
+        name, poke_id, urls, games = data
+        return cls(
+            name,
+            poke_id,
+            {SpriteKey(*entry[:-1]): entry[-1] for entry in urls},
+            {int(generation): [tuple(game) for game in game_list] for generation, game_list in games.items()},
+        )
+
+
+class SpriteTable:
+    """
+    Table des variantes de sprites de tout le Pokédex, avec index inverse
+    variante -> Pokémon pour les requêtes sur tout le Pokédex.
+    """
+
+    def __init__(self, pokemon_sprites=()):
+        self._pokemon = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+        for sprites in pokemon_sprites:
+            self.add(sprites)
+
+    def add(self, sprites):
+        with self._lock:
+            self._pokemon[sprites.name] = sprites
+            self._pokemon[str(sprites.id)] = sprites
+            for key in sprites.urls:
+                self._by_key.setdefault(key, set()).add(sprites.name)
+
+    def get(self, pokemon_name):
+        """
+        Retourne les sprites d'un Pokémon (nom ou id), ajoutés à la table au premier accès.
+        """
+        key = normalize_key(pokemon_name)
+        sprites = self._pokemon.get(key)
+        if sprites is None:
+            sprites = PokemonSprites.from_api(get_pokemon_record(key))
+            self.add(sprites)
+        return sprites
+
+    def pokemon_with(self, **filters):
+        """
+        Retourne les Pokémon ayant au moins une variante correspondant aux filtres.
+        Exemple : pokemon_with(generation=3, game_version="emerald", shiny=True, female=True)
+        Args:
+            filters: Champs de SpriteKey (source, generation, game_version, shiny, female, animated)
+        Returns:
+            Liste triée des noms de Pokémon
+        """
+        names = set()
+        for key, key_names in self._by_key.items():
+            if all(getattr(key, field) == value for field, value in filters.items()):
+                names |= key_names
+        return sorted(names)
+
+    def keys(self):
+        return list(self._by_key)
+
+    def build(self, pokemon_names, workers=BUILD_WORKERS):
+        """
+        Ajoute les sprites de plusieurs Pokémon à la table.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.get, pokemon_names))
+
+    @classmethod
+    def load(cls, path=SPRITE_TABLE_PATH):
+        """
+        Raises:
+            ValueError: La table a été écrite dans un format plus ancien
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        if not isinstance(data, dict) or data.get("format") != TABLE_FORMAT:
+            raise ValueError(f"Table des sprites obsolète : {path}")
+        return cls(PokemonSprites.from_list(entry) for entry in data["pokemon"])
+
+    def save(self, path=SPRITE_TABLE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        unique = {sprites.id: sprites for sprites in self._pokemon.values()}
+        data = {"format": TABLE_FORMAT, "pokemon": [unique[poke_id].to_list() for poke_id in sorted(unique)]}
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    def __contains__(self, pokemon_name):
+        return normalize_key(pokemon_name) in self._pokemon
+
+    def __len__(self):
+        return len({sprites.id for sprites in self._pokemon.values()})
+
+
+_sprite_table = None
+_sprite_table_lock = threading.Lock()
+
+
+def get_sprite_table(path=SPRITE_TABLE_PATH):
+    """
+    Retourne la table des sprites : chargée depuis le disque si elle a été construite,
+    sinon remplie au fil des demandes.
+    """
+    global _sprite_table
+    if _sprite_table is None:
+        with _sprite_table_lock:
+            if _sprite_table is None:
+                try:
+                    _sprite_table = SpriteTable.load(path) if os.path.exists(path) else SpriteTable()
+                except ValueError:
+                    # Table d'un format plus ancien : remplie à nouveau au fil des demandes
+                    _sprite_table = SpriteTable()
+    return _sprite_table
+
+
+def get_pokemon_sprites(pokemon_name):
+    """
+    Retourne les variantes de sprites d'un Pokémon.
+    """
+    return get_sprite_table().get(pokemon_name)
+
+
+def pick_random_sprite(pokemon_name, rng=random, **filters):
+    """
+    Tire au hasard une variante existante du sprite d'un Pokémon, parmi les images PNG ou GIF
+    (les SVG de dream_world ne sont jamais tirés).
+    Args:
+        pokemon_name: Nom du Pokémon
+        rng: Générateur aléatoire
+        filters: Filtres sur les champs de SpriteKey (ex: shiny=False, female=False)
+    Returns:
+        URL du sprite, ou None si aucune variante ne correspond
+    """
+    sprites = get_pokemon_sprites(pokemon_name)
+    variants = [key for key in sprites.variants(**filters) if is_raster(sprites.urls[key])]
+    if not variants:
+        return None
+    return sprites.urls[rng.choice(variants)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Table des variantes de sprites")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit la table pour tout le Pokédex")
+    build_parser.add_argument("path", nargs="?", default=SPRITE_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        table = SpriteTable()
+        table.build([entry.slug for entry in get_roster().filter(forms=True)])
+        table.save(args.path)
+        print(f"Sprites de {len(table)} Pokémon écrits dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pokeapi import CACHE_DIR, get_pokemon_record, normalize_key
+from roster import get_roster
+from type_index import get_type_index
+
+STAT_STORE_PATH = os.environ.get("POKESSENTIAL_STAT_STORE", os.path.join(CACHE_DIR, "stats.npz"))
+BUILD_WORKERS = 8
+STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+# Colonnes : statistiques de base, total, taille (dm), poids (hg) et génération (0 si inconnue)
+COLUMNS = STAT_NAMES + ("total", "height", "weight", "generation")
+AGGREGATES = {"mean": np.mean, "median": np.median, "min": np.min, "max": np.max, "sum": np.sum, "std": np.std}
+
+
+class StatStore:
+    """
+    Statistiques de tous les Pokémon du roster, une colonne NumPy par valeur.
+
+    Ligne i = i-ème Pokémon du roster (trié par id) : filtres, tris et
+    agrégats sont des opérations vectorisées, sans réseau.
+    """
+
+    def __init__(self, ids, slugs, columns):
+        """
+        Args:
+            ids: Tableau des ids de Pokémon
+            slugs: Tableau des noms de Pokémon, aligné sur ids
+            columns: Dictionnaire nom de colonne -> tableau aligné sur ids
+        """
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.slugs = np.asarray(slugs, dtype=str)
+        self.columns = {name: np.asarray(columns[name], dtype=np.int32) for name in COLUMNS}
+        self._rows = {}
+        for row, (poke_id, slug) in enumerate(zip(self.ids.tolist(), self.slugs.tolist())):
+            self._rows[slug] = row
+            self._rows[str(poke_id)] = row
+
+    @classmethod
+    def build(cls, roster=None, workers=BUILD_WORKERS):
+        """
+        Construit le store à partir des ressources /pokemon de tout le roster
+        (servies par le snapshot ou le cache HTTP s'ils sont actifs).
+        """
+        roster = roster or get_roster()
+        entries = roster.entries
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            records = list(executor.map(lambda entry: get_pokemon_record(entry.id), entries))
+
+        columns = {name: np.zeros(len(entries), dtype=np.int32) for name in COLUMNS}
+        for row, (entry, poke) in enumerate(zip(entries, records)):
+            for stat in poke["stats"]:
+                if stat["stat"]["name"] in STAT_NAMES:
+                    columns[stat["stat"]["name"]][row] = stat["base_stat"]
+            columns["height"][row] = poke["height"]
+            columns["weight"][row] = poke["weight"]
+            columns["generation"][row] = entry.generation or 0
+        columns["total"] = sum(columns[name] for name in STAT_NAMES)
+        return cls([entry.id for entry in entries], [entry.slug for entry in entries], columns)
+
+    @classmethod
+    def load(cls, path=STAT_STORE_PATH):
+        with np.load(path) as data:
+            return cls(data["ids"], data["slugs"], {name: data[name] for name in COLUMNS})
+
+    def save(self, path=STAT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, ids=self.ids, slugs=self.slugs, **self.columns)
+
+    def row(self, pokemon_name):
+        """
+        Retourne la ligne d'un Pokémon (nom ou id), ou None s'il est inconnu.
+        """
+        return self._rows.get(normalize_key(pokemon_name))
+
+    def base_stats(self, pokemon_name):
+        """
+        Retourne les statistiques de base d'un Pokémon (même format que get_pokemon_base_stats).
+        """
+        row = self._rows[normalize_key(pokemon_name)]
+        return {name: int(self.columns[name][row]) for name in STAT_NAMES}
+
+    def height_weight(self, pokemon_name):
+        """
+        Retourne (taille en décimètres, poids en hectogrammes) d'un Pokémon.
+        """
+        row = self._rows[normalize_key(pokemon_name)]
+        return int(self.columns["height"][row]), int(self.columns["weight"][row])
+
+    def _column(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise ValueError(f"Colonne inconnue : {name}") from None
+
+    def mask(self, types=(), **ranges):
+        """
+        Retourne le masque booléen des Pokémon correspondant à un filtre.
+        Exemple : mask(types=("fire",), speed=(100, None), generation=1)
+        Args:
+            types: Types que le Pokémon doit tous avoir (via l'index des types)
+            ranges: Colonne -> valeur exacte ou intervalle (min, max) inclusif, None pour non borné
+        """
+        result = np.ones(len(self.ids), dtype=bool)
+        for name, condition in ranges.items():
+            column = self._column(name)
+            if isinstance(condition, tuple):
+                low, high = condition
+                if low is not None:
+                    result &= column >= low
+                if high is not None:
+                    result &= column <= high
+            else:
+                result &= column == condition
+        if types:
+            type_mask = get_type_index().mask(all_types=types)
+            # Bitset -> ids : bit i à 1 si le Pokémon d'id i a les types demandés
+            packed = np.frombuffer(type_mask.to_bytes((type_mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+            bits = np.unpackbits(packed, bitorder="little")
+            result &= np.isin(self.ids, np.flatnonzero(bits))
+        return result
+
+    def filter(self, types=(), **ranges):
+        """
+        Retourne les noms des Pokémon correspondant à un filtre (voir mask()), triés par id.
+        """
+        return self.slugs[self.mask(types, **ranges)].tolist()
+
+    def top(self, column, n=10, ascending=False, types=(), **ranges):
+        """
+        Retourne les n meilleurs Pokémon selon une colonne.
+        Exemple : top("speed", 20, types=("fire",))
+        Returns:
+            Liste de (nom, valeur)
+        """
+        values = self._column(column)
+        rows = np.flatnonzero(self.mask(types, **ranges))
+        order = np.argsort(values[rows] if ascending else -values[rows], kind="stable")[:n]
+        rows = rows[order]
+        return list(zip(self.slugs[rows].tolist(), values[rows].tolist()))
+
+    def aggregate(self, column, by="generation", func="mean", types=(), **ranges):
+        """
+        Agrège une colonne par groupe.
+        Exemple : aggregate("total", by="generation", func="median")
+        Args:
+            column: Colonne à agréger
+            by: Colonne de regroupement
+            func: "mean", "median", "min", "max", "sum" ou "std"
+        Returns:
+            Dictionnaire valeur du groupe -> valeur agrégée
+        """
+        reduce = AGGREGATES[func]
+        selected = self.mask(types, **ranges)
+        values = self._column(column)[selected]
+        groups = self._column(by)[selected]
+        order = np.argsort(groups, kind="stable")
+        group_values, starts = np.unique(groups[order], return_index=True)
+        sorted_values = values[order]
+        bounds = list(starts[1:]) + [len(sorted_values)]
+        return {
+            int(group): float(reduce(sorted_values[start:end]))
+            for group, start, end in zip(group_values, starts, bounds)
+        }
+
+    def histogram(self, column, bins=10, types=(), **ranges):
+        """
+        Distribution d'une colonne.
+        Returns:
+            Tuple (effectifs, bornes des classes)
+        """
+        return np.histogram(self._column(column)[self.mask(types, **ranges)], bins=bins)
+
+    def __contains__(self, pokemon_name):
+        return self.row(pokemon_name) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+
+_stat_store = None
+_stat_store_lock = threading.Lock()
+_missing_path = None  # chemin trouvé absent par get_stat_store(build=False), pour ne pas le revérifier
+
+
+def get_stat_store(build=True, path=STAT_STORE_PATH):
+    """
+    Retourne le store des statistiques, chargé depuis le disque au premier appel.
+    Args:
+        build: Construire (et enregistrer) le store s'il n'existe pas encore sur le disque
+        path: Fichier du store
+    Returns:
+        Le StatStore, ou None s'il n'existe pas et que build est False
+        (l'absence du fichier est retenue : il n'est revérifié que pour un autre chemin ou avec build)
+    """
+    global _stat_store, _missing_path
+    if _stat_store is None and not (path == _missing_path and not build):
+        with _stat_store_lock:
+            if _stat_store is None:
+                if os.path.exists(path):
+                    _stat_store = StatStore.load(path)
+                elif build:
+                    _stat_store = StatStore.build()
+                    _stat_store.save(path)
+                else:
+                    _missing_path = path
+    return _stat_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store des statistiques de base")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit le store à partir de PokéAPI")
+    build_parser.add_argument("path", nargs="?", default=STAT_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        store = StatStore.build()
+        store.save(args.path)
+        print(f"Statistiques de {len(store)} Pokémon écrites dans {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import argparse
+import os
+import sys
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from pokeapi import CACHE_DIR, get_resource
+from type_index import POKEMON_TYPES, get_type_index
+
+TYPE_CHART_PATH = os.environ.get("POKESSENTIAL_TYPE_CHART", os.path.join(CACHE_DIR, "type_chart.npz"))
+# Relations de dégâts de /type/{t} (t attaquant) -> multiplicateur
+DAMAGE_RELATIONS = {"double_damage_to": 2.0, "half_damage_to": 0.5, "no_damage_to": 0.0}
+
+TeamCoverage = namedtuple("TeamCoverage", ["names", "best_multipliers", "best_types", "counts"])
+
+
+def _bits_to_ids(mask):
+    # Bitset de l'index des types -> tableau des ids (bit i à 1 : Pokémon d'id i)
+    packed = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder="little"))
+
+
+class TypeChart:
+    """
+    Table des types : matrix[attaquant, défenseur] = multiplicateur de dégâts (0, 0.5, 1 ou 2).
+
+    Une colonne de 1 est ajoutée à droite (indice len(types)) pour représenter
+    « pas de second type » : le multiplicateur d'un double type (d1, d2) face à
+    l'attaque a vaut extended[a, d1] * extended[a, d2], calculé pour des milliers
+    de typages d'un coup par indexation NumPy.
+    """
+
+    def __init__(self, matrix, types=POKEMON_TYPES):
+        """
+        Args:
+            matrix: Tableau (n, n) des multiplicateurs, attaquant en ligne
+            types: Noms des types, dans l'ordre des lignes et colonnes
+        """
+        self.types = tuple(types)
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.extended = np.hstack([self.matrix, np.ones((len(self.types), 1), dtype=np.float32)])
+        self._numbers = {type_name: number for number, type_name in enumerate(self.types)}
+        self._dex = None
+        self._dex_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, types=POKEMON_TYPES):
+        """
+        Construit la table à partir des damage_relations des ressources /type/{t}
+        (déjà en cache si l'index des types a été construit).
+        """
+        numbers = {type_name: number for number, type_name in enumerate(types)}
+        matrix = np.ones((len(types), len(types)), dtype=np.float32)
+        for attacker, type_name in enumerate(types):
+            relations = get_resource("type", type_name)["damage_relations"]
+            for relation, multiplier in DAMAGE_RELATIONS.items():
+                for entry in relations[relation]:
+                    defender = numbers.get(entry["name"])
+                    if defender is not None:  # types hors table (stellar, shadow, ...)
+                        matrix[attacker, defender] = multiplier
+        return cls(matrix, types)
+
+    @classmethod
+    def load(cls, path=TYPE_CHART_PATH):
+        with np.load(path) as data:
+            return cls(data["matrix"], data["types"].tolist())
+
+    def save(self, path=TYPE_CHART_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, matrix=self.matrix, types=np.asarray(self.types))
+
+    def number(self, type_name):
+        """
+        Retourne l'indice d'un type dans la table (None : colonne « pas de second type »).
+        """
+        if type_name is None:
+            return len(self.types)
+        try:
+            return self._numbers[type_name]
+        except KeyError:
+            raise ValueError(f"Type inconnu : {type_name}") from None
+
+    def _typing_numbers(self, typings):
+        # Liste de typages ([t1] ou [t1, t2]) -> deux tableaux d'indices dans extended
+        first = []
+        second = []
+        for typing in typings:
+            if isinstance(typing, str):
+                typing = (typing,)
+            typing = tuple(typing)
+            if not 1 <= len(typing) <= 2:
+                raise ValueError(f"Un ou deux types attendus : {typing}")
+            first.append(self.number(typing[0]))
+            second.append(self.number(typing[1] if len(typing) == 2 else None))
+        return np.asarray(first, dtype=np.intp), np.asarray(second, dtype=np.intp)
+
+    def multiplier(self, attacking_type, defending_types):
+        """
+        Multiplicateur de dégâts d'une attaque contre un type simple ou double.
+        Args:
+            attacking_type: Type de l'attaque
+            defending_types: Type ou liste d'un ou deux types du défenseur
+        """
+        return float(self.defensive_multipliers([defending_types])[0, self.number(attacking_type)])
+
+    def defensive_multipliers(self, typings):
+        """
+        Multiplicateurs subis par plusieurs typages, pour chaque type d'attaque.
+        Args:
+            typings: Liste de typages (un type, ou liste d'un ou deux types)
+        Returns:
+            Tableau (nombre de typages, nombre de types) : [i, a] = multiplicateur de l'attaque a contre le typage i
+        """
+        first, second = self._typing_numbers(typings)
+        return (self.extended[:, first] * self.extended[:, second]).T
+
+    def defensive_profile(self, defending_types):
+        """
+        Retourne le multiplicateur de chaque type d'attaque contre un typage.
+        Returns:
+            Dictionnaire type d'attaque -> multiplicateur
+        """
+        row = self.defensive_multipliers([defending_types])[0]
+        return dict(zip(self.types, row.tolist()))
+
+    def best_offensive_types(self, typings, attack_types=None):
+        """
+        Retourne, pour chaque typage, le type d'attaque le plus efficace.
+        Args:
+            typings: Liste de typages des cibles
+            attack_types: Types d'attaque disponibles (None : tous)
+        Returns:
+            Liste de tuples (type d'attaque, multiplicateur), alignée sur typings
+        """
+        multipliers = self.defensive_multipliers(typings)
+        candidates = np.arange(len(self.types)) if attack_types is None else np.asarray(
+            [self.number(type_name) for type_name in attack_types], dtype=np.intp
+        )
+        columns = multipliers[:, candidates]
+        best = columns.argmax(axis=1)
+        best_values = columns[np.arange(len(columns)), best]
+        return [(self.types[candidates[b]], float(v)) for b, v in zip(best.tolist(), best_values.tolist())]
+
+    def _dex_multipliers(self):
+        """
+        Multiplicateurs subis par chaque Pokémon de l'index des types, calculés une seule fois.
+        Returns:
+            Tuple (noms triés par id, tableau (nombre de Pokémon, nombre de types))
+        """
+        if self._dex is None:
+            with self._dex_lock:
+                if self._dex is None:
+                    type_index = get_type_index()
+                    everyone = type_index.mask(any_types=self.types)
+                    ids = _bits_to_ids(everyone)
+                    # Appartenance (Pokémon, type) lue dans les bitsets de l'index
+                    membership = np.zeros((len(ids), len(self.types)), dtype=bool)
+                    for number, type_name in enumerate(self.types):
+                        membership[:, number] = np.isin(ids, _bits_to_ids(type_index.mask(all_types=(type_name,))))
+                    # Produit, sur les types du Pokémon, des multiplicateurs de chaque attaque
+                    factors = np.where(membership[:, None, :], self.matrix[None, :, :], np.float32(1))
+                    self._dex = (type_index.query(any_types=self.types), factors.prod(axis=2))
+        return self._dex
+
+    def team_coverage(self, attack_types):
+        """
+        Couverture offensive d'une équipe sur tous les Pokémon de l'index des types.
+        Args:
+            attack_types: Types d'attaque de l'équipe (types de ses capacités, ou ses propres types)
+        Returns:
+            TeamCoverage : noms, meilleur multiplicateur et meilleur type d'attaque contre chacun,
+            et nombre de Pokémon par meilleur multiplicateur
+        """
+        names, multipliers = self._dex_multipliers()
+        candidates = np.asarray(sorted({self.number(type_name) for type_name in attack_types}), dtype=np.intp)
+        if not len(candidates):
+            raise ValueError("Au moins un type d'attaque est nécessaire")
+        columns = multipliers[:, candidates]
+        best = columns.argmax(axis=1)
+        best_multipliers = columns[np.arange(len(columns)), best]
+        values, counts = np.unique(best_multipliers, return_counts=True)
+        return TeamCoverage(
+            names,
+            best_multipliers,
+            [self.types[number] for number in candidates[best].tolist()],
+            dict(zip(values.tolist(), counts.tolist())),
+        )
+
+    def team_defense(self, team_types):
+        """
+        Faiblesses et résistances cumulées d'une équipe.
+        Args:
+            team_types: Typage de chaque membre de l'équipe
+        Returns:
+            Dictionnaire type d'attaque -> (membres qui y sont faibles, membres qui y résistent ou sont immunisés)
+        """
+        multipliers = self.defensive_multipliers(team_types)
+        weak = (multipliers > 1).sum(axis=0)
+        resist = (multipliers < 1).sum(axis=0)
+        return {type_name: (w, r) for type_name, w, r in zip(self.types, weak.tolist(), resist.tolist())}
+
+    def __len__(self):
+        return len(self.types)
+
+
+_type_chart = None
+_type_chart_lock = threading.Lock()
+
+
+def get_type_chart(build=True, path=TYPE_CHART_PATH):
+    """
+    Retourne la table des types, chargée depuis le disque au premier appel.
+    Args:
+        build: Construire (et enregistrer) la table si elle n'existe pas encore sur le disque
+        path: Fichier de la table
+    Returns:
+        La TypeChart, ou None si elle n'existe pas et que build est False
+    """
+    global _type_chart
+    if _type_chart is None:
+        with _type_chart_lock:
+            if _type_chart is None:
+                if os.path.exists(path):
+                    _type_chart = TypeChart.load(path)
+                elif build:
+                    _type_chart = TypeChart.build()
+                    _type_chart.save(path)
+    return _type_chart
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Table des types (efficacité des attaques)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Construit la table à partir de PokéAPI")
+    build_parser.add_argument("path", nargs="?", default=TYPE_CHART_PATH)
+    show_parser = subparsers.add_parser("show", help="Affiche les multiplicateurs subis par un typage")
+    show_parser.add_argument("types", nargs="+", help="Un ou deux types")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        chart = TypeChart.build()
+        chart.save(args.path)
+        print(f"Table de {len(chart)} types écrite dans {args.path}")
+    elif args.command == "show":
+        for type_name, multiplier in get_type_chart().defensive_profile(args.types).items():
+            if multiplier != 1:
+                print(f"{type_name:<10} x{multiplier:g}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
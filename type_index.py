@@ -0,0 +1,152 @@
+import threading
+
+from pokeapi import get_resource, normalize_key, resource_id
+
+POKEMON_TYPES = (
+    "normal", "fighting", "flying", "poison", "ground", "rock",
+    "bug", "ghost", "steel", "fire", "water", "grass",
+    "electric", "psychic", "ice", "dragon", "dark", "fairy",
+)
+
+
+def _iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class TypeIndex:
+    """
+    Index des Pokémon par type.
+
+    Chaque type est un bitset (entier Python) dont le bit i est à 1 si le
+    Pokémon d'id i possède ce type : les requêtes « tous ces types »,
+    « au moins un de ces types » et les exclusions sont des opérations
+    binaires, sans réseau.
+    """
+
+    def __init__(self, masks, names, types_by_id):
+        """
+        Args:
+            masks: Dictionnaire type -> bitset des ids de Pokémon
+            names: Dictionnaire id -> nom du Pokémon
+            types_by_id: Dictionnaire id -> tuple des types (dans l'ordre des slots)
+        """
+        self._masks = masks
+        self._names = names
+        self._ids = {name: poke_id for poke_id, name in names.items()}
+        self._types_by_id = types_by_id
+
+    @classmethod
+    def build(cls, types=POKEMON_TYPES):
+        """
+        Construit l'index à partir des ressources /type/{t} (une requête par type au plus).
+        """
+        masks = {}
+        names = {}
+        slots = {}
+        for type_name in types:
+            mask = 0
+            for entry in get_resource("type", type_name)["pokemon"]:
+                poke_id = resource_id(entry["pokemon"]["url"])
+                names[poke_id] = entry["pokemon"]["name"]
+                slots.setdefault(poke_id, []).append((entry["slot"], type_name))
+                mask |= 1 << poke_id
+            masks[type_name] = mask
+        types_by_id = {poke_id: tuple(t for _, t in sorted(entries)) for poke_id, entries in slots.items()}
+        return cls(masks, names, types_by_id)
+
+    def _type_mask(self, type_name):
+        try:
+            return self._masks[type_name]
+        except KeyError:
+            raise ValueError(f"Type inconnu : {type_name}") from None
+
+    def _to_names(self, mask):
+        return [self._names[poke_id] for poke_id in _iter_bits(mask)]
+
+    def mask(self, all_types=(), any_types=(), exclude=()):
+        """
+        Retourne le bitset des Pokémon correspondant à une requête.
+        Args:
+            all_types: Types que le Pokémon doit tous avoir
+            any_types: Types dont le Pokémon doit avoir au moins un
+            exclude: Types que le Pokémon ne doit pas avoir
+        """
+        result = -1 if not any_types else 0  # -1 : tous les bits à 1
+        for type_name in any_types:
+            result |= self._type_mask(type_name)
+        for type_name in all_types:
+            result &= self._type_mask(type_name)
+        for type_name in exclude:
+            result &= ~self._type_mask(type_name)
+        if result < 0:
+            result &= self.mask(any_types=tuple(self._masks))
+        return result
+
+    def query(self, all_types=(), any_types=(), exclude=()):
+        """
+        Retourne les noms des Pokémon correspondant à une requête, triés par id.
+        Voir mask() pour les arguments.
+        """
+        return self._to_names(self.mask(all_types, any_types, exclude))
+
+    def all_of(self, *types):
+        """
+        Pokémon ayant tous les types donnés.
+        """
+        return self.query(all_types=types)
+
+    def any_of(self, *types):
+        """
+        Pokémon ayant au moins un des types donnés.
+        """
+        return self.query(any_types=types)
+
+    def count(self, *types, exclude=()):
+        """
+        Nombre de Pokémon ayant tous les types donnés (nombre de bonnes réponses au quiz).
+        """
+        return self.mask(all_types=types, exclude=exclude).bit_count()
+
+    def types_of(self, pokemon_name):
+        """
+        Retourne les types d'un Pokémon (nom ou id), ou None s'il est inconnu.
+        """
+        key = normalize_key(pokemon_name)
+        poke_id = int(key) if key.isdigit() else self._ids.get(key)
+        return self._types_by_id.get(poke_id)
+
+    def has_types(self, pokemon_name, types):
+        """
+        Indique si un Pokémon possède tous les types donnés.
+        Returns:
+            True / False, ou None si le Pokémon est inconnu
+        """
+        pokemon_types = self.types_of(pokemon_name)
+        if pokemon_types is None:
+            return None
+        return all(type_name in pokemon_types for type_name in types)
+
+    def __contains__(self, pokemon_name):
+        return self.types_of(pokemon_name) is not None
+
+    def __len__(self):
+        return len(self._names)
+
+
+_type_index = None
+_type_index_lock = threading.Lock()
+
+
+def get_type_index():
+    """
+    Retourne l'index des types, construit au premier appel.
+    """
+    global _type_index
+    if _type_index is None:
+        with _type_index_lock:
+            if _type_index is None:
+                _type_index = TypeIndex.build()
+    return _type_index
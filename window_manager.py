@@ -1,21 +1,44 @@
-import tkinter as tk
-from tkinter import messagebox
-from PIL import Image, ImageTk
-import random
-import requests
-from io import BytesIO
-from simple_functions import get_ability_description, get_poke_sprite, get_pokemon_types
-
-SPRITE_SCALE = 7
-MAX_POKEMON_ID = 1010
-MAX_RANDOM_TRIES = 5
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from metrics import instrumented
+from quiz_engine import CORRECT, EMPTY, WRONG, QuizEngine
+from quiz_rounds import RoundPrefetcher, RoundUnavailable, load_sprite_image
+
+WORKER_COUNT = 4
+POLL_INTERVAL_MS = 50
+
+# Tk et PIL.ImageTk sont importés à la création de la première fenêtre (voir _load_tk) :
+# importer ce module ne nécessite ni affichage ni Tk installé
+tk = None
+messagebox = None
+ImageTk = None
+
+
+def _load_tk():
+    global tk, messagebox, ImageTk
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as tk_messagebox
+        from PIL import ImageTk as pil_image_tk
+
+        tk, messagebox, ImageTk = tkinter, tk_messagebox, pil_image_tk
+
 
 class WindowManager:
     def __init__(self, root):
+        _load_tk()
         self.root = root
         self.root.title("Pokemon Sprite Viewer")
         self.root.withdraw()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_root_close)
         self.menu_window = None
+        self.loading_window = None
+        self.executor = ThreadPoolExecutor(max_workers=WORKER_COUNT, thread_name_prefix="window-manager")
+        self._future = None
+        self._task_id = 0
+        self.prefetcher = RoundPrefetcher()
+        self.engine = QuizEngine(prefetcher=self.prefetcher, load_images=True)
         self.label = tk.Label(root)
         self.label.pack(padx=10, pady=10)
 
@@ -68,7 +91,7 @@ class WindowManager:
         self.menu_window.title("Quiz Pokemon")
         self.menu_window.geometry("360x240")
         self.menu_window.resizable(False, False)
-        self.menu_window.protocol("WM_DELETE_WINDOW", self.root.destroy)
+        self.menu_window.protocol("WM_DELETE_WINDOW", self.close)
         tk.Label(self.menu_window, text="Choisis un type de quiz :").pack(pady=10)
         tk.Button(
             self.menu_window,
@@ -90,6 +113,7 @@ class WindowManager:
         ).pack(pady=5)
         self.menu_window.lift()
         self.menu_window.focus_force()
+        self.prefetcher.start()
 
     def _hide_menu(self):
         if self.menu_window and self.menu_window.winfo_exists():
@@ -102,166 +126,180 @@ class WindowManager:
             self.menu_window.focus_force()
 
     def _close_sprite_window(self):
+        if not (self.menu_window and self.menu_window.winfo_exists()):
+            # Sprite seul (main --sprite) : aucun menu où revenir, on quitte
+            self.close()
+            return
+        self.cancel_background()
         self.root.withdraw()
         self._show_menu()
 
-    def _get_random_pokemon(self):
-        for _ in range(MAX_RANDOM_TRIES):
-            poke_id = random.randint(1, MAX_POKEMON_ID)
+    def _on_root_close(self):
+        self._close_sprite_window()
+
+    def run_in_background(self, work, on_done, on_error=None, loading_text="Chargement..."):
+        """
+        Exécute work() dans le pool de threads puis on_done(resultat) dans le thread Tk.
+        Une seule tâche est suivie à la fois : en lancer une nouvelle ou appeler
+        cancel_background() ignore le résultat de la précédente.
+        Args:
+            work: Fonction sans argument, sans appel à Tk
+            on_done: Fonction appelée avec le résultat
+            on_error: Fonction appelée avec l'exception (par défaut : message d'erreur et retour au menu)
+            loading_text: Texte de la fenêtre de chargement (None pour ne pas l'afficher)
+        """
+        self.cancel_background()
+        task_id = self._task_id
+        future = self.executor.submit(work)
+        self._future = future
+        if loading_text:
+            self._show_loading(loading_text)
+
+        def poll():
+            if task_id != self._task_id:
+                return
+            if not future.done():
+                self.root.after(POLL_INTERVAL_MS, poll)
+                return
+            self._future = None
+            self._hide_loading()
             try:
-                response = requests.get(
-                    f"https://pokeapi.co/api/v2/pokemon/{poke_id}", timeout=10
-                )
-                response.raise_for_status()
-                return response.json()
-            except requests.RequestException:
-                continue
-        return None
+                result = future.result()
+            except Exception as error:
+                (on_error or self._show_round_error)(error)
+                return
+            on_done(result)
+
+        self.root.after(POLL_INTERVAL_MS, poll)
+
+    def cancel_background(self):
+        """
+        Abandonne la tâche en cours : son résultat sera ignoré.
+        """
+        self._task_id += 1
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        self._hide_loading()
+
+    def close(self):
+        self.cancel_background()
+        self.prefetcher.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def _show_loading(self, text):
+        def cancel():
+            self.cancel_background()
+            self._close_sprite_window()
+
+        self._hide_loading()
+        self.loading_window = tk.Toplevel(self.root)
+        self.loading_window.title("Pokemon")
+        self.loading_window.geometry("240x100")
+        self.loading_window.resizable(False, False)
+        self.loading_window.protocol("WM_DELETE_WINDOW", cancel)
+        tk.Label(self.loading_window, text=text).pack(pady=10)
+        tk.Button(self.loading_window, text="Annuler", command=cancel).pack()
+        self.loading_window.lift()
+
+    def _hide_loading(self):
+        if self.loading_window and self.loading_window.winfo_exists():
+            self.loading_window.destroy()
+        self.loading_window = None
+
+    def _show_round_error(self, error):
+        if isinstance(error, RoundUnavailable):
+            messagebox.showerror("Erreur", str(error))
+        else:
+            messagebox.showerror("Erreur", "Impossible de recuperer un Pokemon.")
+        self._close_sprite_window()
 
-    def start_type_quiz(self):
+    def _start_round(self, kind, show_question):
         self._hide_menu()
-        data = self._get_random_pokemon()
-        if not data:
-            messagebox.showerror("Erreur", "Impossible de recuperer un Pokemon.")
-            self._show_menu()
-            return
+        question = self.engine.new_round(kind, block=False)
+        if question is not None:
+            show_question(question)
+        else:
+            # File vide (premier lancement ou réponses très rapides) : préparation à la demande
+            self.run_in_background(lambda: self.engine.new_round(kind), show_question)
+
+    def _answer_callback(self, question, on_finished):
+        """
+        Retourne le callback de saisie d'une question : correction par le moteur, puis message.
+        """
+        def on_submit(guess):
+            verdict = self.engine.answer(question.id, guess)
+            if verdict.status == EMPTY:
+                messagebox.showwarning("Nom manquant", verdict.message)
+                return False
+            if verdict.status == CORRECT:
+                messagebox.showinfo("Bravo", verdict.message)
+            elif verdict.status == WRONG:
+                messagebox.showinfo("Rate", verdict.message)
+            else:
+                messagebox.showerror("Erreur", verdict.message)
+                return False
+            on_finished()
+            return True
 
-        types = [entry["type"]["name"] for entry in data.get("types", [])]
-        if not types:
-            messagebox.showerror("Erreur", "Types indisponibles.")
-            self._show_menu()
-            return
+        return on_submit
 
-        types_text = " / ".join(types)
-        prompt = f"Donne un Pokemon avec les types :\n{types_text}"
+    def _cancel_question(self, question, on_cancel):
+        def cancel():
+            self.engine.discard(question.id)
+            on_cancel()
 
-        def on_submit(pokemon_name):
-            if not pokemon_name:
-                messagebox.showwarning("Nom manquant", "Entre un nom de Pokemon.")
-                return False
-            try:
-                guessed_types = get_pokemon_types(pokemon_name.lower())
-            except Exception:
-                messagebox.showerror("Erreur", "Pokemon introuvable.")
-                return False
+        return cancel
 
-            if all(type_name in guessed_types for type_name in types):
-                messagebox.showinfo("Bravo", "Bonne reponse !")
-            else:
-                messagebox.showinfo("Rate", f"Types attendus : {types_text}")
-            self._show_menu()
-            return True
+    @instrumented
+    def start_type_quiz(self):
+        self._start_round("types", self._show_type_round)
 
+    def _show_type_round(self, question):
         self.text_entry_window(
-            prompt,
-            on_submit,
-            on_cancel=self._show_menu,
+            question.prompt,
+            self._answer_callback(question, self._show_menu),
+            on_cancel=self._cancel_question(question, self._show_menu),
             window_title="Quiz Types",
             size="360x160",
             wraplength=340,
         )
 
+    @instrumented
     def start_sprite_quiz(self):
-        self._hide_menu()
-        data = self._get_random_pokemon()
-        if not data:
-            messagebox.showerror("Erreur", "Impossible de recuperer un Pokemon.")
-            self._show_menu()
-            return
+        self._start_round("sprite", self._show_sprite_round)
 
-        answer_name = data.get("name")
-        if not answer_name:
-            messagebox.showerror("Erreur", "Nom du Pokemon indisponible.")
-            self._show_menu()
-            return
-
-        try:
-            self.open_poke_sprite(answer_name)
-        except Exception:
-            messagebox.showerror("Erreur", "Impossible d'afficher le sprite.")
-            self._show_menu()
-            return
+    def _show_sprite_round(self, question):
+        self.show_sprite_image(question.round.image)
 
-        def on_submit(pokemon_name):
-            if not pokemon_name:
-                messagebox.showwarning("Nom manquant", "Entre un nom de Pokemon.")
-                return False
-            if pokemon_name.lower() == answer_name.lower():
-                messagebox.showinfo("Bravo", "Bonne reponse !")
-            else:
-                messagebox.showinfo("Rate", f"C'etait : {answer_name}")
+        def on_finished():
             self.root.withdraw()
             self._show_menu()
-            return True
 
         self.text_entry_window(
-            "Quel est ce Pokemon ?",
-            on_submit,
-            on_cancel=self._close_sprite_window,
+            question.prompt,
+            self._answer_callback(question, on_finished),
+            on_cancel=self._cancel_question(question, self._close_sprite_window),
             window_title="Quiz Sprite",
         )
 
+    @instrumented
     def start_ability_quiz(self):
-        self._hide_menu()
-        data = self._get_random_pokemon()
-        if not data:
-            messagebox.showerror("Erreur", "Impossible de recuperer un Pokemon.")
-            self._show_menu()
-            return
-
-        abilities = [entry["ability"]["name"] for entry in data.get("abilities", [])]
-        if not abilities:
-            messagebox.showerror("Erreur", "Talents indisponibles.")
-            self._show_menu()
-            return
-
-        ability_name = random.choice(abilities)
-        translated_name = None
-        description = None
-        try:
-            translated_name, description = get_ability_description(ability_name, language="fr")
-        except Exception:
-            translated_name, description = None, None
-
-        if not description:
-            try:
-                translated_name, description = get_ability_description(ability_name, language="en")
-            except Exception:
-                translated_name, description = None, None
-
-        if not description:
-            messagebox.showerror("Erreur", "Description indisponible.")
-            self._show_menu()
-            return
-
-        prompt = f"Description du talent :\n{description}\n\nQuel est le nom du talent ?"
-
-        def on_submit(guess):
-            if not guess:
-                messagebox.showwarning("Nom manquant", "Entre un nom de talent.")
-                return False
-            normalized_guess = guess.strip().lower().replace(" ", "-")
-            normalized_answer = ability_name.lower()
-            normalized_translation = (translated_name or "").lower()
-
-            if normalized_guess in (normalized_answer, normalized_translation):
-                messagebox.showinfo("Bravo", "Bonne reponse !")
-            else:
-                expected = translated_name or ability_name
-                messagebox.showinfo("Rate", f"Reponse : {expected}")
-            self._show_menu()
-            return True
+        self._start_round("ability", self._show_ability_round)
 
+    def _show_ability_round(self, question):
         self.text_entry_window(
-            prompt,
-            on_submit,
-            on_cancel=self._show_menu,
+            question.prompt,
+            self._answer_callback(question, self._show_menu),
+            on_cancel=self._cancel_question(question, self._show_menu),
             window_title="Quiz Talent",
             size="420x260",
             wraplength=380,
         )
 
-    def open_poke_sprite(
+    @instrumented
+    def load_sprite_image(
         self,
         pokemon_name,
         generation=None,
@@ -272,26 +310,24 @@ class WindowManager:
         home_sprite=False,
         official_artwork=False,
     ):
-        
-        sprite_url = get_poke_sprite(
+        """
+        Télécharge et agrandit le sprite d'un Pokémon (sans appel à Tk, utilisable depuis un thread).
+        Returns:
+            Image PIL agrandie de quiz_rounds.SPRITE_SCALE
+        """
+        return load_sprite_image(
             pokemon_name,
-            generation,
-            game_version,
-            shiny,
-            female,
-            showdown_sprite,
-            home_sprite,
-            official_artwork,
+            generation=generation,
+            game_version=game_version,
+            shiny=shiny,
+            female=female,
+            showdown_sprite=showdown_sprite,
+            home_sprite=home_sprite,
+            official_artwork=official_artwork,
         )
-        
 
-        
-        response = requests.get(sprite_url, timeout=10)
-        response.raise_for_status()
-        
-
-        img = Image.open(BytesIO(response.content))
-        img = img.resize((img.width * SPRITE_SCALE, img.height * SPRITE_SCALE), Image.NEAREST)
+    @instrumented
+    def show_sprite_image(self, img):
         photo = ImageTk.PhotoImage(img)
         self.label.config(image=photo, text="")
         self.label.image = photo
@@ -301,6 +337,22 @@ class WindowManager:
         window_height = min(photo.height() + 20, 720)
         self.root.geometry(f"{window_width}x{window_height}")
 
+    @instrumented
+    def open_poke_sprite(self, pokemon_name, *sprite_args, **sprite_options):
+        """
+        Affiche le sprite d'un Pokémon, chargé en arrière-plan.
+        Les arguments sont ceux de load_sprite_image.
+        """
+        def on_error(_error):
+            messagebox.showerror("Erreur", "Impossible d'afficher le sprite.")
+            self._close_sprite_window()
+
+        self.run_in_background(
+            lambda: self.load_sprite_image(pokemon_name, *sprite_args, **sprite_options),
+            self.show_sprite_image,
+            on_error=on_error,
+        )
+
     def prompt_for_pokemon(self):
         def on_submit(pokemon_name):
             if not pokemon_name:
@@ -315,7 +367,21 @@ class WindowManager:
             on_cancel=self.root.destroy,
         )
 
-window = tk.Tk()
-manager = WindowManager(window)
-manager.show_quiz_menu()
-window.mainloop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quiz Pokémon (interface Tk)")
+    parser.add_argument("--sprite", metavar="POKEMON", help="Afficher le sprite d'un Pokémon au lieu du quiz")
+    args = parser.parse_args(argv)
+
+    _load_tk()
+    window = tk.Tk()
+    manager = WindowManager(window)
+    if args.sprite:
+        manager.open_poke_sprite(args.sprite.lower())
+    else:
+        manager.show_quiz_menu()
+    window.mainloop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())